@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""Offline benchmark for the TARS voice pipeline, driven by WAV fixtures.
+
+Replays recorded 16 kHz mono 16-bit WAV files through the same code the
+display runs live:
+
+  wake      WakeWordDetector.feed (speech gate + grammar-restricted Vosk,
+            using the bundled vosk-model-small)
+  endpoint  the AudioRecorder Endpointer (webrtcvad onset/pause detection)
+  captions  LiveCaptioner (optional, --captions)
+  whisper   a pluggable transcriber: stub, engine (resident whisper-server)
+            or cli (whisper-cli)
+
+For each fixture it reports CPU time and real-time factor per stage, wake
+latency and endpoint latency. An optional sidecar ``<name>.json`` with
+``{"wake_end": s, "speech_end": s}`` (seconds into the clip) turns the
+detection times into latencies against the annotated ground truth.
+
+Usage:
+    python3 bench_audio_pipeline.py fixtures/*.wav
+    python3 bench_audio_pipeline.py --transcriber engine --repeat 3 \\
+        --json results.json fixtures/
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Add display directory to path for config and pipeline modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'display'))
+import audio_config as cfg
+import webrtcvad
+from vosk import Model
+from wake_word import WakeWordDetector
+from audio_input import Endpointer, LiveCaptioner
+from audio_source import FRAME_SECONDS, FileSource
+from transcriber import WhisperEngine, WhisperServerError, clean_transcript, strip_wake_phrase, wav_header
+
+
+class StageTimer:
+    """Accumulates CPU and wall time for one pipeline stage."""
+
+    def __init__(self):
+        self.cpu = 0.0
+        self.wall = 0.0
+        self.calls = 0
+
+    def wrap(self, fn):
+        def timed(*args, **kwargs):
+            cpu, wall = time.process_time(), time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.cpu += time.process_time() - cpu
+                self.wall += time.perf_counter() - wall
+                self.calls += 1
+        return timed
+
+    def result(self, audio_seconds):
+        return {
+            'cpu_s': round(self.cpu, 4),
+            'wall_s': round(self.wall, 4),
+            'calls': self.calls,
+            'rtf': round(self.cpu / audio_seconds, 4) if audio_seconds else None,
+        }
+
+
+# --- Transcribers ---
+
+class TranscribeError(Exception):
+    """A transcriber failed on one utterance; the run carries on."""
+
+
+class StubTranscriber:
+    """Stands in for whisper.cpp: fixed text after an optional delay."""
+
+    name = 'stub'
+
+    def __init__(self, text="stub transcription", delay=0.0):
+        self.text = text
+        self.delay = delay
+
+    def transcribe(self, pcm):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.text
+
+    def close(self):
+        pass
+
+
+class EngineTranscriber:
+    """Resident whisper-server, as used by the display."""
+
+    name = 'engine'
+
+    def __init__(self):
+        self.engine = WhisperEngine()
+        if not self.engine.start():
+            raise RuntimeError("whisper-server could not be started")
+
+    def transcribe(self, pcm):
+        try:
+            return self.engine.transcribe(pcm)
+        except WhisperServerError as e:
+            raise TranscribeError(str(e) or type(e).__name__) from e
+
+    def close(self):
+        self.engine.stop()
+
+
+class CliTranscriber:
+    """whisper-cli fallback path (model reloaded per utterance)."""
+
+    name = 'cli'
+
+    def transcribe(self, pcm):
+        try:
+            proc = subprocess.run(
+                [os.path.expanduser(cfg.WHISPER_PATH),
+                 '-m', os.path.expanduser(cfg.WHISPER_MODEL_PATH),
+                 '-f', '-', '-nt'],
+                input=wav_header(len(pcm)) + bytes(pcm),
+                capture_output=True,
+                timeout=cfg.WHISPER_TIMEOUT,
+            )
+        except subprocess.TimeoutExpired as e:
+            raise TranscribeError(f"whisper-cli timed out after {e.timeout}s") from e
+        except OSError as e:
+            raise TranscribeError(f"whisper-cli could not be run: {e}") from e
+        if proc.returncode != 0:
+            detail = proc.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise TranscribeError(
+                f"whisper-cli exited with {proc.returncode}" + (f": {detail[-1]}" if detail else "")
+            )
+        return clean_transcript(proc.stdout.decode('utf-8', 'replace'))
+
+    def close(self):
+        pass
+
+
+def make_transcriber(args):
+    if args.transcriber == 'engine':
+        return EngineTranscriber()
+    if args.transcriber == 'cli':
+        return CliTranscriber()
+    return StubTranscriber(delay=args.stub_delay)
+
+
+# --- Fixtures ---
+
+def load_fixture(path):
+    """Return (frames, annotations) for a 16 kHz mono 16-bit WAV."""
+    source = FileSource(path, speed=0)
+    source.open()
+    try:
+        frames = list(iter(source.read, None))
+    finally:
+        source.close()
+
+    annotations = {}
+    sidecar = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            annotations = json.load(f)
+    return frames, annotations
+
+
+def expand_paths(paths):
+    out = []
+    for path in paths:
+        if os.path.isdir(path):
+            out.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith('.wav')
+            ))
+        else:
+            out.append(path)
+    return out
+
+
+# --- Pipeline run ---
+
+def run_fixture(path, model, transcriber, captions):
+    frames, notes = load_fixture(path)
+    duration = len(frames) * FRAME_SECONDS
+
+    # Wake stage: the detector's own gate + recognizer, without the thread
+    detector = WakeWordDetector(bus=None)
+    detector.model = model
+    detector.recognizer = detector.create_recognizer()
+    wake_total, gate_timer, vosk_timer = StageTimer(), StageTimer(), StageTimer()
+    if detector.gate is not None:
+        detector.gate.process = gate_timer.wrap(detector.gate.process)
+    detector.process_frame = vosk_timer.wrap(detector.process_frame)
+    feed = wake_total.wrap(detector.feed)
+
+    wake_index = None
+    for i, frame in enumerate(frames):
+        if feed(frame):
+            wake_index = i
+            break
+    wake_at = (wake_index + 1) * FRAME_SECONDS if wake_index is not None else None
+    wake_audio = (wake_index + 1 if wake_index is not None else len(frames)) * FRAME_SECONDS
+
+    # Endpoint stage: recording starts right after the wake word, with the
+    # usual pre-roll of already-captured audio in the lead buffer
+    start = wake_index + 1 if wake_index is not None else 0
+    preroll = int(cfg.PREROLL_SECONDS / FRAME_SECONDS)
+    endpointer = Endpointer(webrtcvad.Vad(cfg.VAD_MODE), preroll + cfg.SPEECH_START_FRAMES)
+    endpointer.lead.extend(frames[max(0, start - preroll):start])
+    endpoint_timer, caption_timer = StageTimer(), StageTimer()
+    process = endpoint_timer.wrap(endpointer.process)
+    position = [start]  # Frame index, the captioner's virtual clock
+    captioner = LiveCaptioner(model, lambda: position[0] * FRAME_SECONDS) if captions else None
+    caption_feed = caption_timer.wrap(captioner.feed) if captioner else None
+
+    pcm = bytearray()
+    speech_at = endpoint_at = None
+    max_frames = int(cfg.MAX_RECORDING_SECONDS / FRAME_SECONDS)
+    for i, frame in enumerate(frames[start:start + max_frames], start):
+        position[0] = i + 1
+        recorded, event = process(frame)
+        for f in recorded:
+            pcm += f
+            if caption_feed:
+                caption_feed(f)
+        if event == 'speech_start':
+            speech_at = (i + 1) * FRAME_SECONDS
+        elif event == 'pause':
+            endpoint_at = (i + 1) * FRAME_SECONDS
+            break
+    endpoint_audio = (len(frames) - start if endpoint_at is None else round(endpoint_at / FRAME_SECONDS) - start) * FRAME_SECONDS
+
+    # Transcription stage
+    whisper_timer = StageTimer()
+    text = error = None
+    if pcm:
+        try:
+            text = strip_wake_phrase(whisper_timer.wrap(transcriber.transcribe)(memoryview(pcm)))
+        except TranscribeError as e:
+            # One failed inference should not cost the timings of the whole run
+            error = str(e)
+    speech_seconds = len(pcm) / (cfg.SAMPLE_RATE * 2)
+
+    def latency(detected, truth):
+        if detected is None or truth is None:
+            return None
+        return round(detected - truth, 3)
+
+    stages = {
+        'wake': wake_total.result(wake_audio),
+        'wake_gate': gate_timer.result(wake_audio),
+        'wake_vosk': vosk_timer.result(wake_audio),
+        'endpoint': endpoint_timer.result(endpoint_audio),
+        'whisper': whisper_timer.result(speech_seconds),
+    }
+    if captioner:
+        stages['captions'] = caption_timer.result(speech_seconds)
+
+    return {
+        'fixture': os.path.basename(path),
+        'audio_s': round(duration, 3),
+        'wake_detected_s': wake_at,
+        'wake_latency_s': latency(wake_at, notes.get('wake_end')),
+        'speech_start_s': speech_at,
+        'endpoint_s': endpoint_at,
+        'endpoint_latency_s': latency(endpoint_at, notes.get('speech_end')),
+        'recorded_s': round(speech_seconds, 3),
+        'transcript': text,
+        'transcribe_error': error,
+        'stages': stages,
+    }
+
+
+def aggregate(runs):
+    """Median/max of the headline numbers across all runs."""
+    def spread(values):
+        values = [v for v in values if v is not None]
+        if not values:
+            return None
+        return {'median': round(statistics.median(values), 4), 'max': round(max(values), 4), 'n': len(values)}
+
+    stage_names = sorted({name for run in runs for name in run['stages']})
+    return {
+        'wake_latency_s': spread(r['wake_latency_s'] for r in runs),
+        'endpoint_latency_s': spread(r['endpoint_latency_s'] for r in runs),
+        'wake_misses': sum(1 for r in runs if r['wake_detected_s'] is None),
+        'transcribe_failures': sum(1 for r in runs if r['transcribe_error'] is not None),
+        'rtf': {name: spread(r['stages'][name]['rtf'] for r in runs if name in r['stages'])
+                for name in stage_names},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('fixtures', nargs='+', help="WAV files or directories of them")
+    parser.add_argument('--transcriber', choices=['stub', 'engine', 'cli'], default='stub')
+    parser.add_argument('--stub-delay', type=float, default=0.0,
+                        help="Seconds the stub transcriber sleeps per utterance")
+    parser.add_argument('--captions', action='store_true', help="Also run live captioning")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help="Write results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    paths = expand_paths(args.fixtures)
+    if not paths:
+        parser.error("no WAV fixtures found")
+
+    load_start = time.perf_counter()
+    model = Model(cfg.VOSK_MODEL_PATH)
+    model_load_s = time.perf_counter() - load_start
+
+    transcriber = make_transcriber(args)
+    runs = []
+    try:
+        for _ in range(args.repeat):
+            for path in paths:
+                run = run_fixture(path, model, transcriber, args.captions)
+                runs.append(run)
+                print(f"{run['fixture']}: wake={run['wake_detected_s']} endpoint={run['endpoint_s']} "
+                      f"wake_rtf={run['stages']['wake']['rtf']} endpoint_rtf={run['stages']['endpoint']['rtf']}",
+                      file=sys.stderr)
+                if run['transcribe_error']:
+                    print(f"{run['fixture']}: transcription failed: {run['transcribe_error']}", file=sys.stderr)
+    finally:
+        transcriber.close()
+
+    results = {
+        'benchmark': 'audio_pipeline',
+        'time': time.time(),
+        'host': {'machine': platform.machine(), 'python': platform.python_version()},
+        'config': {
+            'transcriber': transcriber.name,
+            'wake_grammar': cfg.WAKE_GRAMMAR,
+            'gate_enabled': cfg.GATE_ENABLED,
+            'pause_threshold': cfg.PAUSE_THRESHOLD,
+            'repeat': args.repeat,
+        },
+        'model_load_s': round(model_load_s, 3),
+        'summary': aggregate(runs),
+        'runs': runs,
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
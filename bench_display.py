@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""Headless benchmark for the TARS display's ingest and render path.
+
+Runs TarsDisplay under QT_QPA_PLATFORM=offscreen (voice input off) and
+drives it from a fake gateway on a private Unix socket, speaking the same
+protocol as the channel plugin. Each scenario offers traffic at a fixed
+rate for a fixed time:
+
+  status  short status lines
+  reply   4000-character replies sent as whole messages
+  burst   batches of short lines written back to back
+  stream  4000-character replies streamed as reply_start/delta/end
+
+and reports, per scenario:
+
+  latency    socket write -> first paint after the frame was applied
+  frame_ms   GUI-thread heartbeat intervals (nominal 16.7 ms)
+  dropped    60 Hz frames missed while the GUI thread was busy
+  drain_ms   time spent applying each batch of messages
+  paint_ms   time spent painting the transcript
+  rss_mb     resident memory at start/end of the scenario
+
+Usage:
+    python3 bench_display.py
+    python3 bench_display.py --scenario stream --rate 100 --duration 20
+    python3 bench_display.py --protocol 1 --json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('TARS_LOG_LEVEL', 'ERROR')  # Keep stdout for results
+
+# Add display directory to path for config and display modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'display'))
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication
+import display_config as dcfg
+import protocol
+from tars_display import TarsDisplay
+
+FRAME_PERIOD_MS = 1000.0 / 60
+
+# Scenario defaults: rate (messages, bursts or deltas per second), size
+# (characters per message or reply) and burst (messages per burst)
+SCENARIOS = {
+    'status': {'rate': 20.0, 'size': 40, 'burst': 1},
+    'reply': {'rate': 2.0, 'size': 4000, 'burst': 1},
+    'burst': {'rate': 1.0, 'size': 40, 'burst': 200},
+    'stream': {'rate': 50.0, 'size': 4000, 'burst': 1, 'delta': 20},
+}
+
+MARKER = re.compile(r'\[(\d+)\] ')
+FILLER = "The quick brown fox jumps over the lazy dog. "
+
+
+def rss_mb():
+    """Resident set size of this process in MiB."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def text_of(size, prefix=''):
+    body = (FILLER * (size // len(FILLER) + 1))[:max(0, size - len(prefix))]
+    return prefix + body
+
+
+def spread(values):
+    values = sorted(values)
+    if not values:
+        return None
+
+    def pct(p):
+        k = (len(values) - 1) * p / 100.0
+        lo = int(k)
+        hi = min(lo + 1, len(values) - 1)
+        return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+    return {
+        'n': len(values),
+        'mean': round(statistics.fmean(values), 2),
+        'p50': round(pct(50), 2),
+        'p95': round(pct(95), 2),
+        'p99': round(pct(99), 2),
+        'max': round(values[-1], 2),
+    }
+
+
+class Stats:
+    """Measurements shared by the gateway thread and the GUI thread.
+
+    Frames are keyed so the GUI side can recognise them again: whole
+    messages by the ``[seq]`` marker at the start of their text, streamed
+    reply frames by (reply id, frame index).
+    """
+
+    def __init__(self):
+        self.scenario = None
+        self.sent = {}  # Key -> (scenario, monotonic send time)
+        self.applied = []  # Keys applied since the last paint
+        self.stream_frames = {}  # Reply id -> frames applied so far
+        self.painted = 0
+        self.data = {}
+
+    def begin(self, name):
+        self.data[name] = {
+            'latency': [], 'frames': [], 'drain': [], 'paint': [],
+            'sent': 0, 'painted': 0, 'bytes': 0,
+        }
+        self.scenario = name
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+
+class FakeGateway(threading.Thread):
+    """Stands in for the channel plugin's TarsServer."""
+
+    def __init__(self, path, stats, scenarios, args):
+        super().__init__(name="fake-gateway", daemon=True)
+        self.path = path
+        self.stats = stats
+        self.scenarios = scenarios
+        self.args = args
+        self.framed = False
+        self.encoding = 'json'
+        self.streaming = False
+        self.seq = 0
+        self.error = None
+        self.done = threading.Event()
+        self.results = []
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+
+    def run(self):
+        try:
+            self.server.settimeout(10)
+            conn, _ = self.server.accept()
+            conn.settimeout(None)
+            with conn:
+                self.handshake(conn)
+                for name, params in self.scenarios:
+                    self.results.append(self.run_scenario(conn, name, params))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.done.set()
+
+    def handshake(self, conn):
+        """Read the display's hello and answer as a v1 or v2 server."""
+        decoder = protocol.FrameDecoder()
+        hello = None
+        while hello is None:
+            data = conn.recv(65536)
+            if not data:
+                raise ConnectionError("display closed the connection")
+            for kind, value in decoder.feed(data):
+                if kind == 'message' and value.get('type') == 'hello':
+                    hello = value
+
+        if self.args.protocol < protocol.PROTOCOL_VERSION:
+            return  # A v1 server ignores the hello and stays on JSON lines
+        encoding = self.args.encoding
+        if encoding not in hello.get('encodings', ['json']):
+            encoding = 'json'
+        conn.sendall(protocol.encode_message({
+            'type': 'hello',
+            'protocol': protocol.PROTOCOL_VERSION,
+            'encoding': encoding,
+            'maxFrame': protocol.MAX_FRAME_BYTES,
+        }))
+        self.framed = True
+        self.encoding = encoding
+        self.streaming = 'stream' in hello.get('features', [])
+
+    def send(self, conn, key, msg):
+        data = protocol.encode_message(msg, self.framed, self.encoding)
+        stats = self.stats
+        stats.sent[key] = (stats.scenario, time.monotonic())
+        stats[stats.scenario]['sent'] += 1
+        stats[stats.scenario]['bytes'] += len(data)
+        conn.sendall(data)
+
+    def send_line(self, conn, size):
+        self.seq += 1
+        key = ('m', self.seq)
+        self.send(conn, key, {
+            'type': 'message',
+            'text': text_of(size, f"[{self.seq}] "),
+            'timestamp': int(time.time() * 1000),
+        })
+
+    def stream_reply(self, conn, size, delta, pace):
+        """Stream one reply; ``pace`` is called before every frame."""
+        self.seq += 1
+        reply_id = f"r{self.seq}"
+        text = text_of(size)
+        chunks = [text[i:i + delta] for i in range(0, len(text), delta)] or ['']
+        frames = [('reply_start', chunks[0])]
+        frames += [('reply_delta', chunk) for chunk in chunks[1:]]
+        frames.append(('reply_end', text))
+        for index, (kind, chunk) in enumerate(frames):
+            if not pace():
+                kind, chunk = 'reply_end', text  # Out of time: finish the reply
+            self.send(conn, (reply_id, index), {'type': kind, 'id': reply_id, 'text': chunk})
+            if kind == 'reply_end':
+                break
+
+    def run_scenario(self, conn, name, params):
+        stats = self.stats
+        stats.begin(name)
+        print(f"{name}: {params}", file=sys.stderr)
+        rss_start = rss_mb()
+        read_pauses = self.args.display.socket_client.read_pauses
+
+        interval = 1.0 / params['rate']
+        start = time.monotonic()
+        end = start + self.args.duration
+        ticks = [0]
+
+        def pace():
+            """Sleep until the next slot; False once the scenario is over."""
+            due = start + ticks[0] * interval
+            ticks[0] += 1
+            now = time.monotonic()
+            if due > now:
+                time.sleep(due - now)
+            return time.monotonic() < end
+
+        if name == 'stream':
+            if not self.streaming:
+                raise RuntimeError("display did not negotiate streaming (use --protocol 2)")
+            while time.monotonic() < end:
+                self.stream_reply(conn, params['size'], params['delta'], pace)
+        else:
+            while pace():
+                for _ in range(params['burst']):
+                    self.send_line(conn, params['size'])
+        offered_s = time.monotonic() - start
+
+        # Let the display catch up before measuring the next scenario
+        settle_end = time.monotonic() + self.args.settle
+        while stats[name]['painted'] < stats[name]['sent'] and time.monotonic() < settle_end:
+            time.sleep(0.05)
+        time.sleep(0.2)  # A few idle frames for the heartbeat
+        stats.scenario = None
+
+        data = stats[name]
+        frames = data['frames']
+        return {
+            'scenario': name,
+            'params': params,
+            'offered_s': round(offered_s, 3),
+            'sent': data['sent'],
+            'sent_bytes': data['bytes'],
+            'painted': data['painted'],
+            'unpainted': data['sent'] - data['painted'],
+            'latency_ms': spread(data['latency']),
+            'frame_ms': spread(frames),
+            'dropped_frames': sum(max(0, round(ms / FRAME_PERIOD_MS) - 1) for ms in frames),
+            'drain_ms': spread(data['drain']),
+            'paint_ms': spread(data['paint']),
+            'read_pauses': self.args.display.socket_client.read_pauses - read_pauses,
+            'rss_mb': {'start': round(rss_start, 1), 'end': round(rss_mb(), 1),
+                       'growth': round(rss_mb() - rss_start, 1)},
+        }
+
+
+def instrument(display, stats):
+    """Hook the display's drain and paint paths and start a heartbeat."""
+    inbox = display.inbox
+    take_all = inbox.take_all
+    drain_messages = display.drain_messages
+    view = display.transcript_view
+    paint_event = view.paintEvent
+
+    def timed_take_all():
+        items = take_all()
+        for item in items:
+            if isinstance(item, str) or item[0] == 'message':
+                match = MARKER.match(item if isinstance(item, str) else item[2])
+                if match:
+                    stats.applied.append(('m', int(match.group(1))))
+            elif item[0] != 'trace':
+                reply_id = item[1]
+                index = stats.stream_frames.get(reply_id, 0)
+                stats.stream_frames[reply_id] = index + 1
+                stats.applied.append((reply_id, index))
+        return items
+
+    def timed_drain():
+        begin = time.perf_counter()
+        drain_messages()
+        if stats.scenario:
+            stats[stats.scenario]['drain'].append((time.perf_counter() - begin) * 1000)
+
+    def timed_paint(event):
+        begin = time.perf_counter()
+        paint_event(event)
+        now = time.monotonic()
+        name = stats.scenario
+        if name:
+            stats[name]['paint'].append((time.perf_counter() - begin) * 1000)
+        applied, stats.applied = stats.applied, []
+        for key in applied:
+            scenario, sent_at = stats.sent.pop(key, (None, None))
+            if scenario is not None:
+                stats[scenario]['latency'].append((now - sent_at) * 1000)
+                stats[scenario]['painted'] += 1
+
+    inbox.take_all = timed_take_all
+    # Re-point the drain timer so batches are timed too
+    display.drain_timer.timeout.disconnect()
+    display.drain_timer.timeout.connect(timed_drain)
+    view.paintEvent = timed_paint
+
+    # GUI-thread heartbeat: any gap beyond one frame period is a stall
+    heartbeat = QTimer(display)
+    heartbeat.setTimerType(Qt.PreciseTimer)
+    heartbeat.setInterval(round(FRAME_PERIOD_MS))
+    last = [time.perf_counter()]
+
+    def beat():
+        now = time.perf_counter()
+        if stats.scenario:
+            stats[stats.scenario]['frames'].append((now - last[0]) * 1000)
+        last[0] = now
+
+    heartbeat.timeout.connect(beat)
+    heartbeat.start()
+    return heartbeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help="Seconds of traffic per scenario")
+    parser.add_argument('--rate', type=float, help="Override messages/bursts/deltas per second")
+    parser.add_argument('--size', type=int, help="Override characters per message or reply")
+    parser.add_argument('--burst', type=int, help="Override messages per burst")
+    parser.add_argument('--delta', type=int, help="Override characters per streamed delta")
+    parser.add_argument('--protocol', type=int, choices=[1, 2], default=protocol.PROTOCOL_VERSION)
+    parser.add_argument('--encoding', choices=['msgpack', 'json'], default=protocol.ENCODINGS[0])
+    parser.add_argument('--settle', type=float, default=10.0,
+                        help="Max seconds to wait for the display to catch up")
+    parser.add_argument('--json', help="Write results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    scenarios = []
+    for name in args.scenario or list(SCENARIOS):
+        if name == 'stream' and args.protocol < protocol.PROTOCOL_VERSION:
+            print("stream: skipped (needs protocol 2)", file=sys.stderr)
+            continue
+        params = dict(SCENARIOS[name])
+        for option in ('rate', 'size', 'burst', 'delta'):
+            if getattr(args, option) is not None and option in params:
+                params[option] = getattr(args, option)
+        scenarios.append((name, params))
+
+    app = QApplication(sys.argv[:1])
+    rss_boot = rss_mb()
+    stats = Stats()
+    path = os.path.join(tempfile.mkdtemp(prefix='tars-bench-'), 'display.sock')
+    gateway = FakeGateway(path, stats, scenarios, args)
+    gateway.start()
+
+    display = TarsDisplay(path, audio=False)
+    display.show()
+    args.display = display
+    heartbeat = instrument(display, stats)
+
+    def check_done():
+        if gateway.done.is_set():
+            app.quit()
+
+    poll = QTimer()
+    poll.timeout.connect(check_done)
+    poll.start(100)
+    app.exec_()
+    heartbeat.stop()
+    display.close()
+    os.rmdir(os.path.dirname(path))
+
+    if gateway.error is not None:
+        print(f"Benchmark failed: {gateway.error}", file=sys.stderr)
+        sys.exit(1)
+
+    screen = app.primaryScreen().size()
+    results = {
+        'benchmark': 'display',
+        'time': time.time(),
+        'host': {'machine': platform.machine(), 'python': platform.python_version(),
+                 'qpa': os.environ['QT_QPA_PLATFORM']},
+        'config': {
+            'protocol': args.protocol,
+            'encoding': gateway.encoding if gateway.framed else 'json',
+            'duration_s': args.duration,
+            'screen': [screen.width(), screen.height()],
+            'ingest_interval_ms': dcfg.INGEST_INTERVAL_MS,
+            'transcript_max_lines': dcfg.TRANSCRIPT_MAX_LINES,
+            'inbox_high_water': dcfg.INBOX_HIGH_WATER,
+        },
+        'rss_boot_mb': round(rss_boot, 1),
+        'rss_end_mb': round(rss_mb(), 1),
+        'scenarios': gateway.results,
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Shared microphone capture bus for TARS voice input.
+
+A single long-lived capture thread owns the audio source (a microphone or
+a replayed recording, see audio_source.py) and publishes 30ms frames into
+a ring buffer. Wake word detection, VAD recording and
+level metering each read from the ring with their own cursor, so the
+device is opened once and never torn down between utterances.
+"""
+
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+import audio_config as cfg
+import audio_source
+from tars_log import get_logger
+
+log = get_logger("AudioBus")
+
+
+class FrameRing:
+    """Single-producer ring buffer of audio frames.
+
+    The producer stores a frame in its slot and then advances ``head``.
+    Readers copy frames out without taking a lock and re-check ``head``
+    afterwards to detect slots overwritten underneath them. The condition
+    is only used to wake readers up when new frames arrive.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.slots = [b''] * capacity
+        self.head = 0  # Total number of frames ever published
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def publish(self, frame):
+        """Store a frame and wake any waiting readers."""
+        self.slots[self.head % self.capacity] = frame
+        self.head += 1
+        with self._cond:
+            self._cond.notify_all()
+
+    def reopen(self):
+        """Accept frames again after close() (capture restarted)."""
+        self.closed = False
+
+    def close(self):
+        """Mark the ring closed and release all readers."""
+        self.closed = True
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, seq, timeout):
+        """Block until frame ``seq`` is published or the ring is closed."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.head > seq or self.closed, timeout
+            )
+
+
+class FrameReader:
+    """Independent read cursor into a FrameRing."""
+
+    def __init__(self, ring, start):
+        self.ring = ring
+        self.cursor = start
+        self.overruns = 0  # Frames lost because the reader fell behind
+
+    def read(self, timeout=None):
+        """Return the next frame, or None on timeout or when the bus closes."""
+        ring = self.ring
+        if ring.head <= self.cursor and not ring.wait(self.cursor, timeout):
+            return None
+        if ring.head <= self.cursor:
+            return None  # Closed while waiting
+
+        while True:
+            # The slot of frame head - capacity may be mid-overwrite, since
+            # publish() stores the new frame before advancing head
+            oldest = ring.head - ring.capacity + 1
+            if self.cursor < oldest:
+                self.overruns += oldest - self.cursor
+                self.cursor = oldest
+
+            frame = ring.slots[self.cursor % ring.capacity]
+            if ring.head - self.cursor < ring.capacity:
+                break
+            # Overwritten while copying - resync to the oldest valid frame
+
+        self.cursor += 1
+        return frame
+
+    def skip_to_latest(self):
+        """Drop everything queued for this reader."""
+        self.cursor = self.ring.head
+
+
+class AudioCaptureBus(QThread):
+    """Long-lived capture thread feeding a shared FrameRing."""
+
+    error = pyqtSignal(str)
+
+    def __init__(self, source=None):
+        super().__init__()
+        self.running = False
+        self.exhausted = False  # The source ran out (e.g. end of a replay file)
+        self.source = source if source is not None else audio_source.create_source()
+        seconds = max(cfg.BUS_BUFFER_SECONDS, cfg.PREROLL_SECONDS + 1)
+        capacity = int(seconds * cfg.SAMPLE_RATE / cfg.CHUNK_SIZE)
+        self.ring = FrameRing(capacity)
+
+    def subscribe(self, backlog=0):
+        """Return a reader positioned ``backlog`` frames behind the live edge."""
+        backlog = min(backlog, self.ring.capacity, self.ring.head)
+        return FrameReader(self.ring, self.ring.head - backlog)
+
+    def clock(self):
+        """Seconds on the source's timeline (virtual when replaying a file)."""
+        return self.source.clock()
+
+    def start(self):
+        """Start (or restart) capturing; readers see an open ring right away."""
+        self.exhausted = False
+        self.ring.reopen()
+        super().start()
+
+    def initialize(self):
+        """Open the audio source."""
+        try:
+            self.source.open()
+            log.info("Capturing from %s", self.source.name)
+            return True
+
+        except Exception as e:
+            self.error.emit(f"Failed to open audio source ({self.source.name}): {e}")
+            return False
+
+    def run(self):
+        """Capture loop - publish every chunk to the ring."""
+        if not self.initialize():
+            self.ring.close()
+            return
+
+        self.running = True
+
+        while self.running:
+            try:
+                data = self.source.read()
+                if data is None:
+                    log.info("Audio source %s ended", self.source.name)
+                    self.exhausted = True
+                    break
+                self.ring.publish(data)
+            except Exception as e:
+                if self.running:
+                    self.error.emit(f"Audio capture error: {e}")
+                break
+
+        self.ring.close()
+        self.source.close()
+
+    def stop(self):
+        """Stop capturing and release the source."""
+        self.running = False
+        self.wait()
@@ -12,26 +12,74 @@ CHANNELS = 1  # Mono
 CHUNK_SIZE = 480  # 30ms frames (optimal for VAD)
 FORMAT = 'int16'  # 16-bit PCM
 
+# Capture bus settings
+BUS_BUFFER_SECONDS = 3  # Audio history kept in the shared capture ring (> PREROLL_SECONDS)
+
+# Audio source (see audio_source.py): pyaudio, pyaudio-callback, arecord or file
+AUDIO_SOURCE = os.environ.get("TARS_AUDIO_SOURCE", "pyaudio")
+PYAUDIO_DEVICE_INDEX = None  # None = PortAudio default input
+AUDIO_CALLBACK_QUEUE_FRAMES = 32  # ~1s of frames buffered in callback mode
+ARECORD_DEVICE = "default"  # ALSA PCM name, e.g. "plughw:1,0"
+AUDIO_REPLAY_PATH = os.environ.get("TARS_AUDIO_REPLAY")  # WAV or raw s16le file
+AUDIO_REPLAY_SPEED = float(os.environ.get("TARS_AUDIO_REPLAY_SPEED", "1.0"))  # 0 = unpaced
+AUDIO_REPLAY_LOOP = os.environ.get("TARS_AUDIO_REPLAY_LOOP", "") == "1"
+
+# Audio worker supervision (capture and wake threads restart in place)
+SUPERVISOR_RESTART_MIN_SECONDS = 0.05  # First restart delay after a worker dies
+SUPERVISOR_RESTART_MAX_SECONDS = 5.0  # Backoff cap while a device stays broken
+SUPERVISOR_STABLE_SECONDS = 10.0  # Uptime after which the backoff starts over
+
 # Wake word settings
 WAKE_PHRASE = "hey tars"
 VOSK_MODEL_PATH = os.path.join(_CONFIG_DIR, "models", "vosk-model-small")
 WAKE_WORD_THRESHOLD = 0.7  # Confidence threshold
+WAKE_GRAMMAR = True  # Restrict the recognizer to the wake phrase + [unk]
+WAKE_PARTIAL_FRAMES = 3  # Consecutive partial matches needed to fire early
+
+# Wake word pre-gate (skip decoding frames that cannot contain speech)
+GATE_ENABLED = True
+GATE_RMS_THRESHOLD = 300  # int16 RMS below which a frame counts as silence
+GATE_USE_VAD = True  # Also require webrtcvad to flag the frame as speech
+GATE_VAD_MODE = 1  # Less aggressive than recording VAD to avoid missing onsets
+GATE_LEAD_IN_FRAMES = 10  # Frames replayed to the recognizer when the gate opens
+GATE_HANGOVER_FRAMES = 15  # Frames the gate stays open after speech stops
 
 # Voice Activity Detection (VAD)
 VAD_MODE = 3  # 0-3, 3 = most aggressive filtering
 PAUSE_THRESHOLD = 1.5  # Seconds of silence before ending speech
 SPEECH_START_FRAMES = 5  # Frames of speech to confirm start
+PREROLL_SECONDS = 1.5  # Audio before speech start spliced onto each recording
+STRIP_WAKE_PHRASE = True  # Remove a leading wake phrase from transcriptions
+
+# Live captions (Vosk partial results while recording)
+CAPTION_INTERVAL = 0.3  # Minimum seconds between caption updates
 
 # Whisper settings
 WHISPER_MODEL = "base.en"
 WHISPER_PATH = os.path.join(_PROJECT_ROOT, "whisper.cpp", "build", "bin", "whisper-cli")
 WHISPER_MODEL_PATH = os.path.join(_PROJECT_ROOT, "whisper.cpp", "models", "ggml-base.en.bin")
+WHISPER_TIMEOUT = 30  # Seconds allowed for a single transcription
+
+# Resident Whisper engine (whisper.cpp server, model loaded once)
+WHISPER_SERVER_PATH = os.path.join(_PROJECT_ROOT, "whisper.cpp", "build", "bin", "whisper-server")
+WHISPER_SERVER_HOST = "127.0.0.1"
+WHISPER_SERVER_PORT = 8178
+WHISPER_SERVER_THREADS = 4
+WHISPER_SERVER_STARTUP_TIMEOUT = 20  # Seconds to wait for the model to load
+WHISPER_SERVER_RESTART_BACKOFF = 1.0  # Initial restart delay after a crash
+WHISPER_SERVER_RESTART_BACKOFF_MAX = 60.0
 
 # Visualizer settings
 VIS_FPS = 30  # Frames per second for visualizer
 VIS_COLOR = "#00ff41"  # TARS green
 VIS_HISTORY = 100  # Number of amplitude samples to display
+VIS_MAX_POINTS = 240  # Upper bound on polyline points per wave layer
+VIS_IDLE_FPS = 5  # Frame rate once the input level stops changing
+VIS_IDLE_AFTER_FRAMES = 15  # Flat frames before dropping to VIS_IDLE_FPS
+VIS_ACTIVITY_THRESHOLD = 0.005  # Level change that counts as activity
+VIS_FRAME_BUDGET_MS = 16.0  # Paint time budget before optional layers are shed
+VIS_GLOW_SCALE = 2  # Downscale factor for the cached glow layer
+VIS_GLOW_REUSE_PX = 0.5  # Redraw the glow once the wave moves this far (glow pixels)
 
 # Audio buffer settings
-MAX_RECORDING_SECONDS = 30  # Maximum recording length
-TEMP_AUDIO_PATH = "/tmp/tars_voice_input.wav"
+MAX_RECORDING_SECONDS = 30  # Maximum recording length (sizes the capture buffer)
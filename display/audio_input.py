@@ -1,47 +1,150 @@
 """Audio input with VAD and Whisper transcription."""
 
+import json
 import os
-import wave
 import subprocess
-import pyaudio
+import time
+from collections import deque
 import webrtcvad
 import numpy as np
+from vosk import KaldiRecognizer
 from PyQt5.QtCore import QThread, pyqtSignal
 import audio_config as cfg
+from tars_log import get_logger
+import tracing
+from transcriber import WhisperServerError, clean_transcript, strip_wake_phrase, wav_header
+
+log = get_logger("AudioInput")
+
+
+class LiveCaptioner:
+    """Rough live captions from Vosk while Whisper handles the final text."""
+    
+    def __init__(self, model, clock=time.monotonic):
+        self.recognizer = KaldiRecognizer(model, cfg.SAMPLE_RATE)
+        self.clock = clock  # The audio source's clock (virtual during replay)
+        self.committed = []
+        self.caption = ""
+        self.last_emit = 0.0
+    
+    def reset(self):
+        """Start a new utterance."""
+        self.recognizer.Reset()
+        self.committed = []
+        self.caption = ""
+        self.last_emit = 0.0
+    
+    def feed(self, data):
+        """Decode a frame; return updated caption text when one is due."""
+        if self.recognizer.AcceptWaveform(data):
+            text = json.loads(self.recognizer.Result()).get('text', '')
+            if text:
+                self.committed.append(text)
+            partial = ""
+        else:
+            # PartialResult() is only worth computing at the caption rate
+            if self.clock() - self.last_emit < cfg.CAPTION_INTERVAL:
+                return None
+            partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        
+        caption = ' '.join(self.committed + ([partial] if partial else []))
+        caption = strip_wake_phrase(caption) or ""
+        self.last_emit = self.clock()
+        if caption == self.caption:
+            return None
+        self.caption = caption
+        return caption
+
+
+class Endpointer:
+    """VAD endpointing over 30ms frames.
+    
+    Frames roll through a lead buffer until SPEECH_START_FRAMES of speech
+    confirm an utterance; the whole lead (pre-roll plus onset) is then
+    released for recording so no onset frames are lost. Recording ends
+    after PAUSE_THRESHOLD seconds of silence.
+    """
+    
+    def __init__(self, vad, lead_frames):
+        self.vad = vad
+        self.lead = deque(maxlen=lead_frames)
+        self.pause_frames = int(cfg.PAUSE_THRESHOLD * cfg.SAMPLE_RATE / cfg.CHUNK_SIZE)
+        self.speech_frames = 0
+        self.silent_frames = 0
+        self.in_speech = False
+    
+    def process(self, data):
+        """Classify one frame; returns (frames_to_record, event).
+        
+        ``event`` is None, ``'speech_start'`` or ``'pause'`` (end of speech).
+        """
+        if self.vad.is_speech(data, cfg.SAMPLE_RATE):
+            self.speech_frames += 1
+            self.silent_frames = 0
+            
+            if self.in_speech:
+                return (data,), None
+            self.lead.append(data)
+            if self.speech_frames >= cfg.SPEECH_START_FRAMES:
+                # Start recording after enough speech frames
+                self.in_speech = True
+                frames = tuple(self.lead)
+                self.lead.clear()
+                return frames, 'speech_start'
+            return (), None
+        
+        self.speech_frames = 0
+        if not self.in_speech:
+            self.lead.append(data)
+            return (), None
+        
+        # Keep recording during pauses until the threshold is reached
+        self.silent_frames += 1
+        if self.silent_frames >= self.pause_frames:
+            return (data,), 'pause'
+        return (data,), None
 
 
 class AudioRecorder(QThread):
     """Record audio with voice activity detection."""
     
     # Signals
-    audio_level = pyqtSignal(float)  # Amplitude for visualizer
     transcription_ready = pyqtSignal(str)  # Final transcription
+    partial_transcription = pyqtSignal(str)  # Live caption while recording
     error = pyqtSignal(str)
     recording_stopped = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, bus, engine=None, level_meter=None):
         super().__init__()
+        self.bus = bus
+        self.engine = engine  # Resident WhisperEngine, None = CLI only
+        self.level_meter = level_meter  # Shared with the visualizer
         self.recording = False
-        self.audio = None
-        self.stream = None
         self.vad = None
-        self.audio_buffer = []
+        self.caption_model = None
+        self.captioner = None
+        self.trace = None  # tracing.Trace for the current utterance
+        
+        # Preallocated capture region for the longest allowed utterance
+        # plus pre-roll, reused for every recording so peak memory never grows
+        self.max_frames = int(cfg.MAX_RECORDING_SECONDS * cfg.SAMPLE_RATE / cfg.CHUNK_SIZE)
+        self.preroll_frames = int(cfg.PREROLL_SECONDS * cfg.SAMPLE_RATE / cfg.CHUNK_SIZE)
+        self.pcm = bytearray((self.max_frames + self.preroll_frames) * cfg.CHUNK_SIZE * 2)
+        self.pcm_view = memoryview(self.pcm)
+        self.pcm_length = 0
         
     def initialize(self):
-        """Initialize audio stream and VAD."""
+        """Initialize VAD."""
         try:
-            # Initialize VAD
-            self.vad = webrtcvad.Vad(cfg.VAD_MODE)
+            if self.vad is None:
+                self.vad = webrtcvad.Vad(cfg.VAD_MODE)
             
-            # Set up audio stream
-            self.audio = pyaudio.PyAudio()
-            self.stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=cfg.CHANNELS,
-                rate=cfg.SAMPLE_RATE,
-                input=True,
-                frames_per_buffer=cfg.CHUNK_SIZE
-            )
+            # Reuse the already loaded wake word model for live captions
+            if self.caption_model is not None:
+                if self.captioner is None:
+                    self.captioner = LiveCaptioner(self.caption_model, self.bus.clock)
+                else:
+                    self.captioner.reset()
             
             return True
             
@@ -52,55 +155,51 @@ class AudioRecorder(QThread):
     def run(self):
         """Main recording loop with VAD."""
         if not self.initialize():
+            self.recording_stopped.emit()
             return
         
         self.recording = True
-        self.audio_buffer = []
+        self.pcm_length = 0
         
-        silent_frames = 0
-        speech_frames = 0
-        in_speech = False
+        # Start the cursor PREROLL_SECONDS in the past. Until speech is
+        # confirmed, frames only roll through the lead buffer; when it is,
+        # the whole lead (pre-roll plus the speech-start frames) is spliced
+        # onto the recording so "hey tars what's the weather" stays one
+        # utterance and no onset frames are lost.
+        reader = self.bus.subscribe(backlog=self.preroll_frames)
+        endpointer = Endpointer(self.vad, self.preroll_frames + cfg.SPEECH_START_FRAMES)
+        while self.bus.ring.head > reader.cursor:
+            endpointer.lead.append(reader.read(timeout=0))
         
-        max_frames = int(cfg.MAX_RECORDING_SECONDS * cfg.SAMPLE_RATE / cfg.CHUNK_SIZE)
         frame_count = 0
         
-        while self.recording and frame_count < max_frames:
+        while self.recording and frame_count < self.max_frames:
             try:
-                # Read audio chunk
-                data = self.stream.read(cfg.CHUNK_SIZE, exception_on_overflow=False)
+                # Read audio chunk from the shared capture bus
+                data = reader.read(timeout=0.1)
+                if data is None:
+                    if self.bus.ring.closed:
+                        break
+                    continue
                 frame_count += 1
                 
-                # Calculate amplitude for visualizer
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                amplitude = np.abs(audio_data).mean() / 32768.0  # Normalize to 0-1
-                self.audio_level.emit(amplitude)
+                # Calculate amplitude for visualizer (sampled at its frame rate)
+                if self.level_meter is not None:
+                    audio_data = np.frombuffer(data, dtype=np.int16)
+                    amplitude = np.abs(audio_data).mean() / 32768.0  # Normalize to 0-1
+                    self.level_meter.push(amplitude)
                 
                 # Voice activity detection
-                is_speech = self.vad.is_speech(data, cfg.SAMPLE_RATE)
-                
-                if is_speech:
-                    speech_frames += 1
-                    silent_frames = 0
-                    
-                    # Start recording after enough speech frames
-                    if not in_speech and speech_frames >= cfg.SPEECH_START_FRAMES:
-                        in_speech = True
-                        print("[AudioInput] Speech started")
-                    
-                    if in_speech:
-                        self.audio_buffer.append(data)
-                else:
-                    speech_frames = 0
-                    
-                    if in_speech:
-                        silent_frames += 1
-                        self.audio_buffer.append(data)  # Keep recording during pauses
-                        
-                        # Check for pause threshold
-                        pause_frames = int(cfg.PAUSE_THRESHOLD * cfg.SAMPLE_RATE / cfg.CHUNK_SIZE)
-                        if silent_frames >= pause_frames:
-                            print(f"[AudioInput] Pause detected after {len(self.audio_buffer)} frames")
-                            break
+                frames, event = endpointer.process(data)
+                if event == 'speech_start':
+                    log.debug("Speech started")
+                    self.mark('speech_start')
+                for frame in frames:
+                    self.append_frame(frame)
+                if event == 'pause':
+                    log.debug("Pause detected after %d frames", self.frames_recorded())
+                    self.mark('pause')
+                    break
                 
             except Exception as e:
                 if self.recording:
@@ -109,32 +208,70 @@ class AudioRecorder(QThread):
         
         # Stop recording
         self.recording = False
-        self.cleanup_stream()
         
         # Process the audio
-        if self.audio_buffer:
+        if self.pcm_length:
             self.process_audio()
         else:
             self.error.emit("No speech detected")
         
         self.recording_stopped.emit()
     
+    def set_caption_model(self, model):
+        """Enable live captions using a loaded Vosk model (None disables)."""
+        if model is not self.caption_model:
+            self.caption_model = model
+            self.captioner = None
+    
+    def append_frame(self, data):
+        """Copy a frame into the preallocated capture region."""
+        end = self.pcm_length + len(data)
+        if end <= len(self.pcm):
+            self.pcm_view[self.pcm_length:end] = data
+            self.pcm_length = end
+        
+        if self.captioner is not None:
+            caption = self.captioner.feed(data)
+            if caption:
+                self.partial_transcription.emit(caption)
+    
+    def mark(self, stage):
+        """Stamp a stage on the current utterance's trace, if any."""
+        if self.trace is not None:
+            self.trace.mark(stage)
+    
+    def frames_recorded(self):
+        """Number of frames currently held in the capture region."""
+        return self.pcm_length // (cfg.CHUNK_SIZE * 2)
+    
     def process_audio(self):
-        """Save audio to file and transcribe with Whisper."""
+        """Transcribe the recording with the resident engine or whisper-cli."""
         try:
-            # Save audio buffer to WAV file
-            print(f"[AudioInput] Saving {len(self.audio_buffer)} frames to {cfg.TEMP_AUDIO_PATH}")
-            
-            with wave.open(cfg.TEMP_AUDIO_PATH, 'wb') as wf:
-                wf.setnchannels(cfg.CHANNELS)
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(cfg.SAMPLE_RATE)
-                wf.writeframes(b''.join(self.audio_buffer))
+            # View of the captured samples - nothing touches disk. The engine
+            # streams it as is; the whisper-cli fallback copies it once.
+            # Released however transcription ends.
+            with self.pcm_view[:self.pcm_length] as pcm:
+                text = None
+                transcribed = False
+                self.mark('whisper_start')
+                
+                if self.engine is not None:
+                    try:
+                        log.info("Transcribing %d frames with Whisper engine...", self.frames_recorded())
+                        text = self.engine.transcribe(pcm)
+                        transcribed = True
+                    except WhisperServerError as e:
+                        log.warning("Whisper engine unavailable (%s), falling back to whisper-cli", e)
+                
+                if not transcribed:
+                    text = self.transcribe_whisper(pcm)
+                self.mark('whisper_end')
             
-            # Transcribe with Whisper
-            text = self.transcribe_whisper()
+            # The pre-roll usually carries the wake phrase itself
+            text = strip_wake_phrase(text)
             
             if text:
+                log.info("Transcribed: %s", text)
                 self.transcription_ready.emit(text)
             else:
                 self.error.emit("Transcription failed")
@@ -142,8 +279,8 @@ class AudioRecorder(QThread):
         except Exception as e:
             self.error.emit(f"Audio processing error: {e}")
     
-    def transcribe_whisper(self):
-        """Run whisper.cpp to transcribe audio file."""
+    def transcribe_whisper(self, pcm):
+        """Run whisper.cpp on PCM piped through stdin as a WAV stream."""
         try:
             whisper_bin = os.path.expanduser(cfg.WHISPER_PATH)
             model_path = os.path.expanduser(cfg.WHISPER_MODEL_PATH)
@@ -154,52 +291,46 @@ class AudioRecorder(QThread):
             if not os.path.exists(model_path):
                 raise FileNotFoundError(f"Whisper model not found: {model_path}")
             
-            print(f"[AudioInput] Transcribing with Whisper...")
+            log.info("Transcribing with whisper-cli...")
             
-            # Run whisper.cpp
-            result = subprocess.run(
-                [whisper_bin, '-m', model_path, '-f', cfg.TEMP_AUDIO_PATH, '-nt'],
-                capture_output=True,
-                text=True,
-                timeout=30
+            # Run whisper.cpp, "-f -" reads the WAV from stdin
+            process = subprocess.Popen(
+                [whisper_bin, '-m', model_path, '-f', '-', '-nt'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
             )
+            try:
+                # communicate() interleaves the write with reading both
+                # pipes, so a chatty whisper-cli cannot deadlock the write;
+                # joining header and samples copies the utterance once
+                stdout, stderr = process.communicate(
+                    input=wav_header(len(pcm)) + pcm, timeout=cfg.WHISPER_TIMEOUT
+                )
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
             
-            if result.returncode != 0:
-                print(f"[AudioInput] Whisper error: {result.stderr}")
+            if process.returncode != 0:
+                log.error("Whisper error: %s", stderr.decode('utf-8', 'replace'))
                 return None
             
             # Parse output - whisper.cpp outputs "[BLANK_AUDIO]" for silence
-            output = result.stdout.strip()
+            text = clean_transcript(stdout.decode('utf-8', 'replace').strip())
             
-            # Extract text (whisper outputs timestamp + text)
-            lines = [line.strip() for line in output.split('\n') if line.strip()]
-            text_lines = [line for line in lines if not line.startswith('[')]
+            if not text:
+                log.info("No transcription found")
             
-            if not text_lines:
-                print("[AudioInput] No transcription found")
-                return None
-            
-            text = ' '.join(text_lines).strip()
-            print(f"[AudioInput] Transcribed: {text}")
-            
-            return text if text and text != "[BLANK_AUDIO]" else None
+            return text
             
         except subprocess.TimeoutExpired:
-            print("[AudioInput] Whisper timeout")
+            log.error("Whisper timeout")
             return None
         except Exception as e:
-            print(f"[AudioInput] Whisper error: {e}")
+            log.error("Whisper error: %s", e)
             return None
     
     def stop_recording(self):
         """Stop the recording."""
         self.recording = False
-    
-    def cleanup_stream(self):
-        """Clean up audio stream."""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        
-        if self.audio:
-            self.audio.terminate()
@@ -0,0 +1,257 @@
+"""Audio sources for the TARS capture bus.
+
+The capture bus pulls 30ms frames of 16-bit mono PCM from an AudioSource
+instead of opening a device itself, so the whole voice pipeline can run
+from a microphone or from a recording:
+
+  pyaudio           PortAudio, blocking reads (the default)
+  pyaudio-callback  PortAudio, frames pushed from its callback thread
+  arecord           raw PCM piped from ALSA's arecord (no PortAudio needed)
+  file              WAV or raw PCM replay, optionally faster than real time
+
+Each source also provides the clock its frames are stamped in. Live sources
+use time.monotonic(); file replay uses a virtual clock that advances by
+exactly one frame per read, so timing-dependent behaviour (e.g. caption
+throttling) is the same at any replay speed.
+
+    TARS_AUDIO_SOURCE=file TARS_AUDIO_REPLAY=utterance.wav \\
+        TARS_AUDIO_REPLAY_SPEED=8 ./run_display.sh
+"""
+
+import queue
+import subprocess
+import time
+import wave
+from abc import ABC, abstractmethod
+import audio_config as cfg
+from tars_log import get_logger
+
+log = get_logger("AudioSource")
+
+FRAME_BYTES = cfg.CHUNK_SIZE * cfg.CHANNELS * 2
+FRAME_SECONDS = cfg.CHUNK_SIZE / cfg.SAMPLE_RATE
+
+
+class AudioSource(ABC):
+    """Produces CHUNK_SIZE-sample frames of int16 PCM."""
+
+    name = "source"
+
+    @abstractmethod
+    def open(self):
+        """Acquire the device or file; raises on failure."""
+
+    @abstractmethod
+    def read(self):
+        """Return the next frame, or None once the source is exhausted."""
+
+    @abstractmethod
+    def close(self):
+        """Release the device or file."""
+
+    def clock(self):
+        """Current time in seconds on this source's timeline."""
+        return time.monotonic()
+
+
+class PyAudioSource(AudioSource):
+    """PortAudio input stream in blocking or callback mode.
+
+    In callback mode PortAudio's own thread hands frames over through a
+    short queue; if the bus falls behind, the oldest frames are dropped
+    and counted in ``overflows``.
+    """
+
+    def __init__(self, callback=False, device_index=None):
+        self.callback = callback
+        self.device_index = device_index
+        self.name = "pyaudio-callback" if callback else "pyaudio"
+        self.audio = None
+        self.stream = None
+        self.frames = queue.Queue(maxsize=cfg.AUDIO_CALLBACK_QUEUE_FRAMES)
+        self.overflows = 0
+
+    def open(self):
+        import pyaudio
+        self.continue_flag = pyaudio.paContinue
+        self.audio = pyaudio.PyAudio()
+        try:
+            self.stream = self.audio.open(
+                format=pyaudio.paInt16,
+                channels=cfg.CHANNELS,
+                rate=cfg.SAMPLE_RATE,
+                input=True,
+                input_device_index=self.device_index,
+                frames_per_buffer=cfg.CHUNK_SIZE,
+                stream_callback=self._on_audio if self.callback else None,
+            )
+        except Exception:
+            self.audio.terminate()
+            self.audio = None
+            raise
+
+    def _on_audio(self, data, frame_count, time_info, status):
+        try:
+            self.frames.put_nowait(data)
+        except queue.Full:
+            try:
+                self.frames.get_nowait()
+            except queue.Empty:
+                pass
+            self.frames.put_nowait(data)
+            self.overflows += 1
+        return (None, self.continue_flag)
+
+    def read(self):
+        if not self.callback:
+            return self.stream.read(cfg.CHUNK_SIZE, exception_on_overflow=False)
+        while True:
+            try:
+                return self.frames.get(timeout=0.5)
+            except queue.Empty:
+                if not self.stream.is_active():
+                    raise OSError("PortAudio stream stopped")
+
+    def close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio:
+            self.audio.terminate()
+            self.audio = None
+
+
+class ArecordSource(AudioSource):
+    """Raw PCM read from an ``arecord`` child process."""
+
+    name = "arecord"
+
+    def __init__(self, device="default"):
+        self.device = device
+        self.proc = None
+
+    def open(self):
+        self.proc = subprocess.Popen(
+            ['arecord', '-q', '-D', self.device, '-t', 'raw', '-f', 'S16_LE',
+             '-c', str(cfg.CHANNELS), '-r', str(cfg.SAMPLE_RATE)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def read(self):
+        data = self.proc.stdout.read(FRAME_BYTES)
+        if len(data) < FRAME_BYTES:
+            # arecord only stops on its own when the device fails
+            self.proc.wait()
+            detail = self.proc.stderr.read().decode('utf-8', 'replace').strip()
+            raise OSError(f"arecord exited ({self.proc.returncode}): {detail}")
+        return data
+
+    def close(self):
+        if self.proc:
+            if self.proc.poll() is None:
+                self.proc.terminate()
+                try:
+                    self.proc.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    self.proc.kill()
+                    self.proc.wait()
+            self.proc.stdout.close()
+            self.proc.stderr.close()
+            self.proc = None
+
+
+class FileSource(AudioSource):
+    """Replay a 16 kHz mono 16-bit WAV (or headerless raw PCM) file.
+
+    ``speed`` is a multiple of real time; 0 replays as fast as the bus can
+    publish. The clock is virtual: seconds of audio delivered so far.
+    """
+
+    name = "file"
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.file = None
+        self.wav = None
+        self.frames_read = 0
+        self.loops = 0
+        self.started = None
+
+    def open(self):
+        if not self.path:
+            raise FileNotFoundError("No replay file configured (TARS_AUDIO_REPLAY)")
+        if self.path.lower().endswith('.wav'):
+            self.wav = wave.open(self.path, 'rb')
+            fmt = (self.wav.getframerate(), self.wav.getnchannels(), self.wav.getsampwidth())
+            if fmt != (cfg.SAMPLE_RATE, cfg.CHANNELS, 2):
+                self.wav.close()
+                self.wav = None
+                raise ValueError(
+                    f"{self.path}: need {cfg.SAMPLE_RATE} Hz x{cfg.CHANNELS} 16-bit, got "
+                    f"{fmt[0]} Hz x{fmt[1]} {8 * fmt[2]}-bit"
+                )
+        else:
+            self.file = open(self.path, 'rb')
+        self.frames_read = 0
+        self.started = time.monotonic()
+
+    def _read_chunk(self):
+        if self.wav is not None:
+            return self.wav.readframes(cfg.CHUNK_SIZE)
+        return self.file.read(FRAME_BYTES)
+
+    def _rewind(self):
+        if self.wav is not None:
+            self.wav.rewind()
+        else:
+            self.file.seek(0)
+
+    def read(self):
+        data = self._read_chunk()
+        if not data and self.loop and self.frames_read:
+            self.loops += 1
+            log.debug("Replay of %s looped (%d)", self.path, self.loops)
+            self._rewind()
+            data = self._read_chunk()
+        if not data:
+            return None
+        if len(data) < FRAME_BYTES:
+            data += b'\0' * (FRAME_BYTES - len(data))
+
+        self.frames_read += 1
+        if self.speed > 0:
+            # Pace against the wall clock at `speed` x real time
+            due = self.started + self.clock() / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def clock(self):
+        return self.frames_read * FRAME_SECONDS
+
+
+def create_source(kind=None):
+    """Build the source selected by AUDIO_SOURCE (or ``kind``)."""
+    kind = kind or cfg.AUDIO_SOURCE
+    if kind == 'pyaudio':
+        return PyAudioSource(device_index=cfg.PYAUDIO_DEVICE_INDEX)
+    if kind == 'pyaudio-callback':
+        return PyAudioSource(callback=True, device_index=cfg.PYAUDIO_DEVICE_INDEX)
+    if kind == 'arecord':
+        return ArecordSource(cfg.ARECORD_DEVICE)
+    if kind == 'file':
+        return FileSource(cfg.AUDIO_REPLAY_PATH, cfg.AUDIO_REPLAY_SPEED, cfg.AUDIO_REPLAY_LOOP)
+    raise ValueError(f"Unknown audio source {kind!r}")
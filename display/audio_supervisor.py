@@ -0,0 +1,148 @@
+"""Supervisor for the TARS audio worker threads.
+
+Owns the capture bus, the wake word detector and the recorder. The Vosk
+model and the wake recognizer live as long as the supervisor, so when a
+worker dies (a USB microphone glitch, a device error mid-read) it is
+restarted in place after a short backoff instead of taking wake detection
+down until the display is restarted. Wake detection is re-armed whenever
+a recording thread finishes, however it finished.
+"""
+
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import audio_config as cfg
+from audio_bus import AudioCaptureBus
+from audio_input import AudioRecorder
+from wake_word import WakeWordDetector
+from tars_log import get_logger
+
+log = get_logger("AudioSupervisor")
+
+
+class AudioSupervisor(QObject):
+    """Starts, watches and restarts the long-lived audio threads."""
+
+    wake_word_detected = pyqtSignal()
+    ready = pyqtSignal()  # Wake detection is listening for the first time
+    error = pyqtSignal(str)
+    restarted = pyqtSignal(str, int)  # Worker name, its restart count
+    worker_stopped = pyqtSignal(str)  # Hops from the worker thread to ours
+
+    def __init__(self, model, engine=None, level_meter=None, source=None):
+        super().__init__()
+        self.model = model  # Resident for the life of the supervisor
+        self.engine = engine
+        self.stopping = False
+        self.first_ready = True
+
+        self.bus = AudioCaptureBus(source)
+        self.detector = WakeWordDetector(self.bus, model)
+        self.recorder = AudioRecorder(self.bus, engine, level_meter)
+        self.recorder.set_caption_model(model)
+
+        # Long-lived workers, restarted in this order
+        self.workers = {'capture': self.bus, 'wake': self.detector}
+        self.restarts = {name: 0 for name in self.workers}
+        self.failures = {name: 0 for name in self.workers}  # Consecutive quick failures
+        self.started_at = {name: 0.0 for name in self.workers}
+        self.timers = {}
+        for name in self.workers:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda name=name: self.revive(name))
+            self.timers[name] = timer
+
+        for name, worker in self.workers.items():
+            worker.error.connect(self.error)
+            worker.finished.connect(lambda name=name: self.worker_stopped.emit(name))
+        self.worker_stopped.connect(self.on_worker_finished)
+        self.detector.wake_word_detected.connect(self.wake_word_detected)
+        self.detector.ready.connect(self.on_detector_ready)
+        self.recorder.error.connect(self.error)
+        self.recorder.finished.connect(self.on_recording_finished)
+
+    def start(self):
+        """Start capture, then wake word detection."""
+        self.stopping = False
+        self.revive()
+
+    def stop(self):
+        """Stop every worker (no restarts after this)."""
+        self.stopping = True
+        for timer in self.timers.values():
+            timer.stop()
+        self.detector.stop()
+        if self.recorder.isRunning():
+            self.recorder.stop_recording()
+            self.recorder.wait()
+        self.bus.stop()
+        if self.engine is not None:
+            self.engine.stop()
+
+    def start_recording(self, trace=None):
+        """Record the utterance after a wake word; False if one is running."""
+        if self.recorder.isRunning():
+            self.detector.resume()  # Nothing will re-arm it otherwise
+            return False
+        self.recorder.trace = trace
+        self.recorder.start()
+        return True
+
+    def stats(self):
+        return {
+            'restarts': dict(self.restarts),
+            'running': {name: worker.isRunning() for name, worker in self.workers.items()},
+        }
+
+    # --- Restarts ---
+
+    def revive(self, name=None):
+        """(Re)start a worker, or all that are down; capture comes first."""
+        if self.stopping:
+            return
+        # Reviving capture also brings back a wake thread that stopped with it
+        names = [name] if name == 'wake' else list(self.workers)
+        now = time.monotonic()
+        for worker_name in names:
+            worker = self.workers[worker_name]
+            if not worker.isRunning():
+                self.timers[worker_name].stop()
+                self.started_at[worker_name] = now
+                worker.start()
+        if not self.recorder.isRunning():
+            self.detector.resume()
+
+    def on_worker_finished(self, name):
+        if self.stopping:
+            return
+        if name == 'wake' and self.bus.ring.closed:
+            return  # Capture went down under it; reviving capture restarts it
+        if name == 'capture' and self.bus.exhausted:
+            log.info("Audio source finished, not restarting capture")
+            return
+
+        # Workers that ran for a while start over from the shortest delay
+        if time.monotonic() - self.started_at[name] >= cfg.SUPERVISOR_STABLE_SECONDS:
+            self.failures[name] = 0
+        delay = min(
+            cfg.SUPERVISOR_RESTART_MIN_SECONDS * (2 ** self.failures[name]),
+            cfg.SUPERVISOR_RESTART_MAX_SECONDS,
+        )
+        self.failures[name] += 1
+        self.restarts[name] += 1
+        log.warning("%s worker stopped, restarting in %.0f ms (restart #%d)",
+                    name, delay * 1000, self.restarts[name])
+        self.restarted.emit(name, self.restarts[name])
+        self.timers[name].start(int(delay * 1000))
+
+    def on_detector_ready(self):
+        if self.first_ready:
+            self.first_ready = False
+            self.ready.emit()
+        else:
+            log.info("Wake word detection restarted")
+
+    def on_recording_finished(self):
+        """Re-arm wake detection after every recording."""
+        if not self.stopping:
+            self.detector.resume()
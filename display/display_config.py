@@ -0,0 +1,23 @@
+"""Display configuration for the TARS screen."""
+
+# Message ingest
+INGEST_INTERVAL_MS = 16  # Pending messages are applied at most once per frame
+
+# Transcript styling
+TEXT_COLOR = "#00ff41"  # TARS green
+BACKGROUND_COLOR = "#0a0e14"
+
+# Transcript retention (memory and relayout cost stay flat over long sessions)
+TRANSCRIPT_MAX_LINES = 2000
+TRANSCRIPT_MARGIN = 6  # Horizontal padding in pixels
+
+# Socket client
+RECONNECT_MIN_SECONDS = 0.5  # First retry delay after a failed connect
+RECONNECT_MAX_SECONDS = 10.0  # Backoff cap
+INBOX_HIGH_WATER = 500  # Stop reading the socket while this many items await the GUI
+INBOX_LOW_WATER = 100  # Resume reading once the GUI has caught up to here
+SEND_BUFFER_MAX_BYTES = 256 * 1024  # Drop outgoing messages above this backlog
+
+# Latency tracing (summarize with: python3 display/tracing.py)
+TRACE_ENABLED = True
+TRACE_PATH = "~/.cache/tars/traces.jsonl"
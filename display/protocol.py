@@ -0,0 +1,162 @@
+"""Wire protocol for the TARS display socket.
+
+Version 1 is newline-delimited JSON. The display opens with a JSON
+``hello`` line offering version 2; once the server answers, both sides
+may send length-prefixed frames::
+
+    [u32 BE length of type + payload][u8 type][payload]
+
+MESSAGE frames carry a dict in the negotiated encoding (msgpack when the
+``msgpack`` package is installed, JSON otherwise) and BINARY frames carry
+raw bytes. Frames are capped at MAX_FRAME_BYTES, so a frame always starts
+with a zero byte and can be told apart from a JSON line on the same stream.
+"""
+
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_VERSION = 2
+MAX_FRAME_BYTES = 1024 * 1024
+MAX_LINE_BYTES = 1024 * 1024
+
+FRAME_MESSAGE = 0x01
+FRAME_BINARY = 0x02
+
+ENCODINGS = ['msgpack', 'json'] if msgpack else ['json']
+
+_HEADER = struct.Struct('>IB')
+
+
+class ProtocolError(Exception):
+    """The peer sent something that cannot be decoded safely."""
+
+
+def hello(features=(), last_seq=0, epoch=None):
+    """Client hello line offering every version and encoding we support.
+
+    ``last_seq``/``epoch`` identify the last history entry this display
+    has shown, so the server replays only what it missed.
+    """
+    message = {
+        'type': 'hello',
+        'protocol': [1, PROTOCOL_VERSION],
+        'encodings': ENCODINGS,
+        'features': list(features),
+        'last_seq': last_seq,
+    }
+    if epoch is not None:
+        message['epoch'] = epoch
+    return encode_message(message, framed=False)
+
+
+def _pack(message, encoding):
+    if encoding == 'msgpack':
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+
+def _unpack(payload, encoding):
+    if encoding == 'msgpack':
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def _frame(frame_type, payload):
+    if len(payload) + 1 > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {len(payload)} bytes exceeds limit")
+    return _HEADER.pack(len(payload) + 1, frame_type) + payload
+
+
+def encode_message(message, framed=False, encoding='json'):
+    """Encode a dict as a JSON line, or as a MESSAGE frame once upgraded."""
+    if not framed:
+        return (json.dumps(message) + '\n').encode('utf-8')
+    return _frame(FRAME_MESSAGE, _pack(message, encoding))
+
+
+def encode_binary(data):
+    """Wrap raw bytes in a BINARY frame."""
+    return _frame(FRAME_BINARY, bytes(data))
+
+
+class FrameDecoder:
+    """Incremental decoder for a mixed JSON-line / frame byte stream.
+
+    Incoming bytes go into one bytearray that is compacted only once the
+    consumed prefix dominates it, and each byte is scanned for a newline
+    once, so decoding is O(n) however the stream is chunked.
+
+    ``feed`` yields ``(kind, value)`` pairs where kind is ``'message'`` (a
+    dict), ``'binary'`` (bytes) or ``'invalid'`` (an error string). Frames
+    are decoded as they are yielded, so a hello that switches ``encoding``
+    applies to the frames right behind it in the same read.
+    """
+
+    def __init__(self):
+        self.encoding = 'json'
+        self.buf = bytearray()
+        self.start = 0
+        self.scanned = 0  # Bytes after start already searched for a newline
+
+    def feed(self, data):
+        buf = self.buf
+        if self.start and self.start >= len(buf) // 2:
+            del buf[:self.start]
+            self.start = 0
+        buf += data
+
+        end = len(buf)
+        while self.start < end:
+            start = self.start
+            if buf[start] == 0:
+                # Length-prefixed frame
+                if end - start < 5:
+                    break
+                length, frame_type = _HEADER.unpack_from(buf, start)
+                if length < 1 or length > MAX_FRAME_BYTES:
+                    raise ProtocolError(f"Invalid frame length {length}")
+                if end - start < 4 + length:
+                    break
+                payload = bytes(buf[start + 5:start + 4 + length])
+                self.start = start + 4 + length
+                self.scanned = 0
+                yield self._decode_frame(frame_type, payload)
+                continue
+
+            # Newline-delimited JSON
+            idx = buf.find(b'\n', start + self.scanned)
+            if idx == -1:
+                self.scanned = end - start
+                if self.scanned > MAX_LINE_BYTES:
+                    raise ProtocolError(f"Line exceeds {MAX_LINE_BYTES} bytes")
+                break
+            line = bytes(buf[start:idx])
+            self.start = idx + 1
+            self.scanned = 0
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError as e:
+                yield ('invalid', f"{e}: {line[:100]!r}")
+            else:
+                yield ('message', message)
+
+        if self.start == len(buf):
+            buf.clear()
+            self.start = 0
+
+    def _decode_frame(self, frame_type, payload):
+        if frame_type == FRAME_BINARY:
+            return ('binary', payload)
+        if frame_type != FRAME_MESSAGE:
+            return ('invalid', f"Unknown frame type {frame_type}")
+        try:
+            return ('message', _unpack(payload, self.encoding))
+        except Exception as e:
+            return ('invalid', f"Undecodable frame: {e}")
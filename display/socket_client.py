@@ -0,0 +1,232 @@
+"""Event-driven connection from the TARS display to OpenClaw.
+
+The socket is owned by an asyncio loop running on its own thread, so the
+GUI never blocks on the network. Incoming bytes go through the protocol
+FrameDecoder, which only decodes complete lines and frames (multi-byte
+characters split across reads are never decoded halfway). Outgoing
+messages are handed to the loop with ``call_soon_threadsafe`` and written
+there, in order, by a single writer.
+
+Both directions are bounded: reading pauses while the GUI has a deep
+backlog (so the server's own queue and overflow policy take over), and
+outgoing messages are dropped if the socket's write buffer is backed up.
+The user's own input and cancel frames are exempt from that cap; if one
+still cannot be written, send_failed tells the GUI.
+"""
+
+import asyncio
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+import display_config as dcfg
+import protocol
+from tars_log import get_logger
+
+log = get_logger("SocketClient")
+
+# Frames the user produced; never dropped to relieve the write buffer
+USER_FRAMES = ('input', 'cancel')
+
+
+class SocketClient(QObject):
+    """Connects to the channel socket, reconnecting with backoff."""
+
+    messages_pending = pyqtSignal()
+    connected = pyqtSignal(bool)
+    send_failed = pyqtSignal(str, str)  # Frame type, trace id ('' if none)
+
+    def __init__(self, socket_path, inbox):
+        super().__init__()
+        self.socket_path = socket_path
+        self.inbox = inbox
+        self.loop = None
+        self.thread = None
+        self.task = None
+        self.writer = None  # Only touched on the loop thread
+        self.framed = False  # Length-prefixed frames negotiated
+        self.encoding = 'json'
+        self.is_connected = False
+        self.last_seq = 0  # Newest server history entry shown (replay cursor)
+        self.epoch = None  # Server run that last_seq belongs to
+        self.dropped_sends = 0
+        self.read_pauses = 0
+
+    def start(self):
+        """Start the network thread."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="tars-socket", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Close the connection and stop the network thread right away."""
+        if self.loop is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._cancel)
+        except RuntimeError:
+            pass  # Loop already closed
+        self.thread.join(timeout=2)
+        self.loop = None
+
+    def send_message(self, text, trace=None):
+        """Queue a message to OpenClaw; False when not connected."""
+        loop = self.loop
+        if loop is None or not self.is_connected:
+            return False
+        msg = {
+            "type": "input",
+            "text": text,
+            "timestamp": int(time.time() * 1000)
+        }
+        if trace is not None:
+            msg["trace_id"] = trace.trace_id
+        try:
+            loop.call_soon_threadsafe(self._write, msg, trace)
+        except RuntimeError:
+            return False
+        return True
+
+    def send_cancel(self):
+        """Ask OpenClaw to abort the reply in flight (barge-in)."""
+        loop = self.loop
+        if loop is None or not self.is_connected:
+            return False
+        try:
+            loop.call_soon_threadsafe(self._write, {"type": "cancel"})
+        except RuntimeError:
+            return False
+        return True
+
+    # --- Loop thread ---
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.task = self.loop.create_task(self._connect_loop())
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def _cancel(self):
+        if self.task:
+            self.task.cancel()
+
+    def _set_connected(self, connected):
+        if connected != self.is_connected:
+            self.is_connected = connected
+            self.connected.emit(connected)
+
+    async def _connect_loop(self):
+        delay = dcfg.RECONNECT_MIN_SECONDS
+        while True:
+            log.debug("Attempting to connect to %s", self.socket_path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except FileNotFoundError:
+                log.info("Socket not found, retrying in %.1fs", delay)
+            except ConnectionRefusedError:
+                log.info("Connection refused, retrying in %.1fs", delay)
+            except OSError as e:
+                log.warning("Connect error: %s, retrying in %.1fs", e, delay)
+            else:
+                log.info("Connected to %s", self.socket_path)
+                delay = dcfg.RECONNECT_MIN_SECONDS
+                await self._session(reader, writer)
+                log.info("Connection closed, reconnecting...")
+
+            self._set_connected(False)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, dcfg.RECONNECT_MAX_SECONDS)
+
+    async def _session(self, reader, writer):
+        """Handshake, then read until the connection drops."""
+        decoder = protocol.FrameDecoder()
+        self.framed = False
+        self.encoding = 'json'
+        self.writer = writer
+        self._set_connected(True)
+
+        try:
+            # Offer protocol v2; stay on JSON lines until the server agrees.
+            # The server replays whatever was sent after last_seq.
+            writer.write(protocol.hello(['stream'], self.last_seq, self.epoch))
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for kind, value in decoder.feed(data):
+                    if kind == 'invalid':
+                        log.warning("Invalid message: %s", value)
+                    elif kind == 'message':
+                        self._handle_message(value, decoder)
+                if len(self.inbox) > dcfg.INBOX_HIGH_WATER:
+                    await self._wait_for_gui()
+        except protocol.ProtocolError as e:
+            log.error("Protocol error: %s", e)
+        except OSError as e:
+            log.warning("Socket error: %s", e)
+        finally:
+            self.writer = None
+            writer.close()
+
+    async def _wait_for_gui(self):
+        """Stop reading until the GUI drains its backlog."""
+        self.read_pauses += 1
+        interval = dcfg.INGEST_INTERVAL_MS / 1000.0
+        while len(self.inbox) > dcfg.INBOX_LOW_WATER:
+            await asyncio.sleep(interval)
+
+    def _handle_message(self, msg, decoder):
+        """Apply one decoded message from the server."""
+        msg_type = msg.get('type')
+        seq = msg.get('seq')
+        if msg_type != 'hello' and isinstance(seq, int) and seq > self.last_seq:
+            self.last_seq = seq
+        if msg_type == 'hello':
+            self.framed = msg.get('protocol', 1) >= protocol.PROTOCOL_VERSION
+            self.encoding = msg.get('encoding', 'json')
+            decoder.encoding = self.encoding
+            if msg.get('epoch') != self.epoch:
+                # New gateway run: its history starts over (and is replayed in full)
+                self.epoch = msg.get('epoch')
+                self.last_seq = 0
+            log.info("Negotiated protocol v%s (%s)", msg.get('protocol', 1), self.encoding)
+        elif msg_type == 'message':
+            # Tagged so the display can tell replies from its own local lines
+            if self.inbox.put(('message', None, msg.get('text', ''))):
+                self.messages_pending.emit()
+        elif msg_type == 'trace':
+            # Gateway stage timestamps for an utterance we sent
+            if self.inbox.put(('trace', msg.get('id'), msg.get('stages') or {})):
+                self.messages_pending.emit()
+        elif msg_type in ('reply_start', 'reply_delta', 'reply_end'):
+            # Streamed reply, applied in place by the display
+            if self.inbox.put((msg_type, msg.get('id'), msg.get('text', ''))):
+                self.messages_pending.emit()
+
+    def _write(self, msg, trace=None):
+        msg_type = msg.get('type')
+        if self.writer is None:
+            log.warning("Dropped %s message: not connected", msg_type)
+            self._send_failed(msg, trace)
+            return
+        if (msg_type not in USER_FRAMES
+                and self.writer.transport.get_write_buffer_size() > dcfg.SEND_BUFFER_MAX_BYTES):
+            self.dropped_sends += 1
+            log.warning("Dropped %s message: send buffer full", msg_type)
+            return
+        try:
+            data = protocol.encode_message(msg, self.framed, self.encoding)
+            if trace is not None:
+                trace.mark('send')
+            self.writer.write(data)
+        except Exception as e:
+            log.error("Failed to send message: %s", e)
+            self._send_failed(msg, trace)
+
+    def _send_failed(self, msg, trace):
+        self.dropped_sends += 1
+        if msg.get('type') in USER_FRAMES:
+            self.send_failed.emit(msg.get('type'), trace.trace_id if trace is not None else '')
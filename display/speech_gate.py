@@ -0,0 +1,62 @@
+"""Energy/VAD pre-gate for wake word decoding.
+
+Most of the day the microphone hears a silent room. Running every 30ms
+frame through Kaldi regardless burns CPU on the always-on Pi, so frames
+first pass a cheap RMS check (and optionally webrtcvad). Only frames that
+might contain speech are decoded; a short lead-in buffer replays the audio
+just before the gate opened so word onsets are not clipped.
+"""
+
+from collections import deque
+import numpy as np
+import webrtcvad
+import audio_config as cfg
+
+
+class SpeechGate:
+    """Decide which captured frames are worth decoding."""
+
+    def __init__(self):
+        self.vad = webrtcvad.Vad(cfg.GATE_VAD_MODE) if cfg.GATE_USE_VAD else None
+        self.lead_in = deque(maxlen=cfg.GATE_LEAD_IN_FRAMES)
+        self.open = False
+        self.hangover = 0
+
+    def reset(self):
+        """Close the gate and forget buffered lead-in audio."""
+        self.lead_in.clear()
+        self.open = False
+        self.hangover = 0
+
+    def is_candidate(self, data):
+        """Cheap check whether a frame could contain speech."""
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        if rms < cfg.GATE_RMS_THRESHOLD:
+            return False
+        if self.vad is not None:
+            return self.vad.is_speech(data, cfg.SAMPLE_RATE)
+        return True
+
+    def process(self, data):
+        """Return the frames that should be decoded for this input frame."""
+        if self.is_candidate(data):
+            self.hangover = cfg.GATE_HANGOVER_FRAMES
+            if not self.open:
+                # Opening - replay the lead-in so onsets reach the recognizer
+                self.open = True
+                frames = list(self.lead_in)
+                frames.append(data)
+                self.lead_in.clear()
+                return frames
+            return [data]
+
+        if self.open:
+            # Hangover keeps short gaps between words inside the gate
+            self.hangover -= 1
+            if self.hangover <= 0:
+                self.open = False
+            return [data]
+
+        self.lead_in.append(data)
+        return []
@@ -1,117 +1,97 @@
 #!/usr/bin/env python3
 """
 TARS Display - Native PyQt5 interface for TARS embodiment with voice input
+
+The window and the OpenClaw connection come up first; the voice stack
+(NumPy, webrtcvad, Vosk, PyAudio) is imported and its models are loaded
+on a background thread afterwards.
 """
-print("=" * 60, flush=True)
-print("TARS DISPLAY STARTING - DEBUG MODE", flush=True)
-print("=" * 60, flush=True)
+import tracing
+startup = tracing.StartupTimer(expect=('imports', 'first_paint', 'socket_connected', 'wake_ready'))
+
 import sys
-import socket
-import os
-import json
-import time
-from pathlib import Path
+import threading
+from collections import deque
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTextEdit,
+    QApplication, QMainWindow,
     QVBoxLayout, QWidget, QLabel, QStackedWidget
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt5.QtGui import QFont, QPalette, QColor, QTextCursor
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
+import display_config as dcfg
+from socket_client import SocketClient
+from transcript import TranscriptView
+from tars_log import get_logger
 
-# Import audio components
-try:
-    from wake_word import WakeWordDetector
-    from audio_input import AudioRecorder
-    from visualizer import AudioVisualizer
-    AUDIO_AVAILABLE = True
-except ImportError as e:
-    print(f"[TARS Display] Audio components not available: {e}")
-    AUDIO_AVAILABLE = False
+log = get_logger("Display")
+log.info("TARS display starting")
+startup.mark('imports')
 
 
-class SocketListener(QThread):
-    """Background thread to listen for messages from OpenClaw"""
-    message_received = pyqtSignal(str)
-    connected = pyqtSignal(bool)
+class AudioLoader(QThread):
+    """Imports the voice stack and loads its models off the GUI thread"""
+    
+    loaded = pyqtSignal(object, object)  # Vosk model, WhisperEngine
+    failed = pyqtSignal(str)
     
-    def __init__(self, socket_path):
+    def __init__(self, startup=None):
         super().__init__()
-        self.socket_path = socket_path
-        self.running = True
-        self.sock = None
-        
+        self.startup = startup
+        self.engine = None  # Kept so closeEvent can stop it if never handed over
+    
     def run(self):
-        """Connect to Unix socket and listen for messages"""
-        print(f"[SocketListener] Thread started, running={self.running}", flush=True)
-        while self.running:
-            try:
-                # Connect to OpenClaw's Unix socket
-                print(f"[SocketListener] Attempting to connect to {self.socket_path}", flush=True)
-                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                self.sock.connect(self.socket_path)
-                print(f"[SocketListener] Connected to {self.socket_path}", flush=True)
-                self.connected.emit(True)
-                
-                buffer = ""
-                while self.running:
-                    data = self.sock.recv(4096)
-                    if not data:
-                        print(f"[SocketListener] Connection closed (no data)", flush=True)
-                        break
-                    
-                    print(f"[SocketListener] Received {len(data)} bytes", flush=True)    
-                    buffer += data.decode('utf-8')
-                    
-                    # Process complete JSON messages (newline-delimited)
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        if line.strip():
-                            print(f"[SocketListener] Processing line: {line[:100]}", flush=True)
-                            try:
-                                msg = json.loads(line)
-                                if msg.get('type') == 'message':
-                                    print(f"[SocketListener] Emitting message: {msg.get('text', '')[:50]}", flush=True)
-                                    self.message_received.emit(msg.get('text', ''))
-                            except json.JSONDecodeError:
-                                print(f"[SocketListener] Invalid JSON: {line}", flush=True)
-                
-                self.sock.close()
-                self.sock = None
-                self.connected.emit(False)
-                print("[TARS Display] Connection closed, retrying...")
-                
-            except FileNotFoundError:
-                print(f"[TARS Display] Socket not found: {self.socket_path}")
-                self.connected.emit(False)
-                QThread.sleep(2)
-            except ConnectionRefusedError:
-                print(f"[TARS Display] Connection refused, retrying...")
-                self.connected.emit(False)
-                QThread.sleep(2)
-            except Exception as e:
-                print(f"[TARS Display] Error: {e}")
-                self.connected.emit(False)
-                QThread.sleep(2)
+        try:
+            import audio_supervisor, visualizer  # noqa: F401 (warm the imports)
+            from wake_word import load_model
+            from transcriber import WhisperEngine
+        except ImportError as e:
+            self.failed.emit(f"dependencies missing: {e}")
+            return
+        if self.startup is not None:
+            self.startup.mark('audio_imported')
+        
+        try:
+            model = load_model()
+        except Exception as e:
+            self.failed.emit(f"wake word model unavailable: {e}")
+            return
+        if self.startup is not None:
+            self.startup.mark('model_loaded')
+        
+        # Resident Whisper engine (loads the model once, in its own process)
+        engine = self.engine = WhisperEngine()
+        if not engine.start():
+            log.warning("Whisper engine unavailable, using whisper-cli")
+        self.loaded.emit(model, engine)
+
+
+class IngestQueue:
+    """Thread-safe queue of display lines, drained by the GUI once per frame"""
+    
+    def __init__(self):
+        self.items = deque()
+        self.lock = threading.Lock()
+        self.signalled = False
     
-    def send_message(self, text):
-        """Send a message to OpenClaw"""
-        if self.sock:
-            try:
-                msg = json.dumps({
-                    "type": "input",
-                    "text": text,
-                    "timestamp": int(time.time() * 1000)
-                }) + "\n"
-                self.sock.send(msg.encode('utf-8'))
-                return True
-            except Exception as e:
-                print(f"[TARS Display] Failed to send message: {e}")
+    def put(self, text):
+        """Queue a line; True if the consumer needs to be woken up"""
+        with self.lock:
+            self.items.append(text)
+            if self.signalled:
                 return False
-        return False
+            self.signalled = True
+            return True
+    
+    def __len__(self):
+        return len(self.items)
     
-    def stop(self):
-        """Stop the listener thread"""
-        self.running = False
+    def take_all(self):
+        """Remove and return everything queued so far"""
+        with self.lock:
+            items = list(self.items)
+            self.items.clear()
+            self.signalled = False
+        return items
 
 
 class TarsDisplay(QMainWindow):
@@ -122,10 +102,24 @@ class TarsDisplay(QMainWindow):
     STATE_LISTENING = "listening"
     STATE_PROCESSING = "processing"
     
-    def __init__(self, socket_path):
+    def __init__(self, socket_path, audio=True, startup=None):
         super().__init__()
         self.socket_path = socket_path
+        self.audio_enabled = audio
+        self.audio_ready = False  # Voice stack loaded and started
+        self.startup = startup  # tracing.StartupTimer, None when not timing
+        self.closing = False
         self.state = self.STATE_NORMAL
+        
+        # Incoming lines are queued and applied in batches, once per frame
+        self.inbox = IngestQueue()
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setSingleShot(True)
+        self.drain_timer.setInterval(dcfg.INGEST_INTERVAL_MS)
+        self.drain_timer.timeout.connect(self.drain_messages)
+        self.reply_lines = {}  # Streamed reply id -> transcript line id
+        self.trace = None  # tracing.Trace for the utterance in flight
+        
         self.init_ui()
         self.init_socket()
         self.init_audio()
@@ -154,24 +148,15 @@ class TarsDisplay(QMainWindow):
         normal_layout.setContentsMargins(0, 0, 0, 0)
         normal_layout.setSpacing(0)
         
-        # Text display area
-        self.text_display = QTextEdit()
-        self.text_display.setReadOnly(True)
-        self.text_display.setFrameStyle(0)
-        
-        # TARS aesthetic styling
-        palette = QPalette()
-        palette.setColor(QPalette.Base, QColor("#0a0e14"))
-        palette.setColor(QPalette.Text, QColor("#00ff41"))
-        self.text_display.setPalette(palette)
-        
         # Monospace font
         self.font = QFont("Courier New", 14)
         self.font.setStyleHint(QFont.Monospace)
-        self.text_display.setFont(self.font)
-        self.text_display.setCursor(Qt.BlankCursor)
         
-        normal_layout.addWidget(self.text_display, stretch=1)
+        # Transcript area (bounded list, only visible rows are laid out)
+        self.transcript_view = TranscriptView(self.font)
+        self.transcript_view.setCursor(Qt.BlankCursor)
+        
+        normal_layout.addWidget(self.transcript_view, stretch=1)
         
         # === LISTENING VIEW (audio visualizer) ===
         listening_widget = QWidget()
@@ -191,14 +176,11 @@ class TarsDisplay(QMainWindow):
         separator.setStyleSheet("color: #00ff41;")
         separator.setAlignment(Qt.AlignCenter)
         
-        # Visualizer
-        if AUDIO_AVAILABLE:
-            self.visualizer = AudioVisualizer()
-            self.visualizer.setMinimumHeight(200)
-        else:
-            self.visualizer = QLabel("[Audio visualizer unavailable]")
-            self.visualizer.setAlignment(Qt.AlignCenter)
-            self.visualizer.setStyleSheet("color: #00ff41;")
+        # Visualizer (placeholder until the voice stack has loaded)
+        self.visualizer = QLabel("[Voice initializing...]" if self.audio_enabled
+                                 else "[Audio visualizer unavailable]")
+        self.visualizer.setAlignment(Qt.AlignCenter)
+        self.visualizer.setStyleSheet("color: #00ff41;")
         
         # Transcription display
         self.transcription_label = QLabel("")
@@ -215,6 +197,7 @@ class TarsDisplay(QMainWindow):
         
         listening_layout.addWidget(self.listening_title)
         listening_layout.addWidget(separator)
+        self.listening_layout = listening_layout
         listening_layout.addWidget(self.visualizer, stretch=1)
         listening_layout.addWidget(self.transcription_label)
         listening_layout.addWidget(self.instruction_label)
@@ -232,108 +215,162 @@ class TarsDisplay(QMainWindow):
         self.append_message("=" * 60)
         self.append_message("TARS SYSTEMS ONLINE")
         self.append_message("Awaiting connection to OpenClaw...")
-        if AUDIO_AVAILABLE:
-            self.append_message("Voice input: Enabled (say 'Hey TARS')")
+        if self.audio_enabled:
+            self.append_message("Voice input: Initializing...")
         else:
-            self.append_message("Voice input: Disabled (dependencies missing)")
+            self.append_message("Voice input: Disabled")
         self.append_message("=" * 60)
         self.append_message("")
         
     def init_socket(self):
-        """Initialize socket listener"""
-        print(f"[TARS Display] Starting socket listener for {self.socket_path}", flush=True)
-        self.socket_thread = SocketListener(self.socket_path)
-        self.socket_thread.message_received.connect(self.append_message)
-        self.socket_thread.connected.connect(self.on_connection_changed)
-        self.socket_thread.start()
-        print(f"[TARS Display] Socket listener thread started", flush=True)
+        """Initialize socket client"""
+        log.info("Starting socket client for %s", self.socket_path)
+        self.socket_client = SocketClient(self.socket_path, self.inbox)
+        self.socket_client.messages_pending.connect(self.schedule_drain)
+        self.socket_client.connected.connect(self.on_connection_changed)
+        self.socket_client.send_failed.connect(self.on_send_failed)
+        self.socket_client.start()
     
     def init_audio(self):
-        """Initialize audio components"""
-        if not AUDIO_AVAILABLE:
+        """Start loading the voice stack in the background"""
+        if not self.audio_enabled:
+            if self.startup is not None:
+                self.startup.skip('wake_ready')
             return
         
-        # Wake word detector
-        self.wake_detector = WakeWordDetector()
-        self.wake_detector.wake_word_detected.connect(self.on_wake_word)
-        self.wake_detector.error.connect(self.on_audio_error)
-        
-        # Audio recorder
-        self.audio_recorder = AudioRecorder()
-        self.audio_recorder.audio_level.connect(self.on_audio_level)
-        self.audio_recorder.transcription_ready.connect(self.on_transcription)
-        self.audio_recorder.error.connect(self.on_audio_error)
-        self.audio_recorder.recording_stopped.connect(self.on_recording_stopped)
-        
-        # Start wake word detection
-        self.wake_detector.start()
-        self.append_message("[TARS] Listening for 'Hey TARS'...")
+        self.audio_loader = AudioLoader(self.startup)
+        self.audio_loader.loaded.connect(self.on_audio_loaded)
+        self.audio_loader.failed.connect(self.on_audio_unavailable)
+        self.audio_loader.start()
+    
+    def on_audio_loaded(self, model, engine):
+        """Wire up and start the voice components (GUI thread)"""
+        if self.closing:
+            engine.stop()
+            return
+        from audio_supervisor import AudioSupervisor
+        from visualizer import AudioVisualizer, LevelMeter
+        
+        # Swap the placeholder for the real visualizer
+        self.level_meter = LevelMeter()
+        visualizer = AudioVisualizer(self.level_meter)
+        visualizer.setMinimumHeight(200)
+        self.listening_layout.replaceWidget(self.visualizer, visualizer)
+        self.visualizer.deleteLater()
+        self.visualizer = visualizer
+        
+        # Capture, wake word and recorder threads, restarted in place if
+        # they die (the model loaded by the loader thread stays resident)
+        self.audio = AudioSupervisor(model, engine, self.level_meter)
+        self.audio.wake_word_detected.connect(self.on_wake_word)
+        self.audio.ready.connect(self.on_wake_ready)
+        self.audio.error.connect(self.on_audio_error)
+        self.audio.recorder.transcription_ready.connect(self.on_transcription)
+        self.audio.recorder.partial_transcription.connect(self.on_partial_transcription)
+        
+        self.audio_ready = True
+        self.audio.start()
+    
+    def on_wake_ready(self):
+        """Wake word detection is live"""
+        if self.startup is not None:
+            self.startup.mark('wake_ready')
+        self.append_message("[TARS] Voice ready - listening for 'Hey TARS'...")
+    
+    def on_audio_unavailable(self, reason):
+        """The voice stack could not be loaded"""
+        log.warning("Voice input unavailable: %s", reason)
+        self.append_message(f"Voice input: Disabled ({reason})")
+        self.visualizer.setText("[Audio visualizer unavailable]")
+        if self.startup is not None:
+            self.startup.skip('wake_ready')
     
     def on_connection_changed(self, connected):
         """Handle connection status changes"""
         if connected:
+            if self.startup is not None:
+                self.startup.mark('socket_connected')
             self.append_message("[TARS] Connected to OpenClaw")
         else:
             self.append_message("[TARS] Disconnected from OpenClaw")
+            self.reply_lines.clear()
+    
+    def on_send_failed(self, msg_type, trace_id):
+        """An input queued for OpenClaw never made it onto the socket"""
+        if msg_type != 'input':
+            return
+        self.append_message("[TARS] Failed to send message")
+        if self.trace is not None and self.trace.trace_id == trace_id:
+            self.finish_trace()
     
     def on_wake_word(self):
         """Handle wake word detection"""
-        print("[TARS Display] Wake word detected!")
+        log.info("Wake word detected")
         self.set_state(self.STATE_LISTENING)
         
-        # Start recording
-        if hasattr(self, 'audio_recorder'):
-            self.audio_recorder.start()
+        # Start recording (the detector stays paused until it finishes)
+        if self.audio_ready:
+            trace = tracing.Trace(started_ms=self.audio.detector.detected_at)
+            if self.audio.start_recording(trace):
+                # Barge-in: speaking over a reply cancels it on the gateway
+                if self.reply_lines or (self.trace is not None and 'send' in self.trace.marks):
+                    self.socket_client.send_cancel()
+                self.finish_trace()
+                self.trace = trace
     
-    def on_audio_level(self, level):
-        """Handle audio level updates for visualizer"""
-        if AUDIO_AVAILABLE and hasattr(self, 'visualizer'):
-            self.visualizer.add_level(level)
+    def on_partial_transcription(self, text):
+        """Show live captions while the user is still speaking"""
+        if self.state == self.STATE_LISTENING:
+            self.transcription_label.setText(text)
     
     def on_transcription(self, text):
         """Handle transcription ready"""
-        print(f"[TARS Display] Transcription: {text}")
+        log.info("Transcription: %s", text)
         self.set_state(self.STATE_PROCESSING)
         
         # Display transcribed text
         self.append_message(f"> {text} [voice]")
         
         # Send to OpenClaw
-        if self.socket_thread.send_message(text):
+        if self.socket_client.send_message(text, self.trace):
             pass
         else:
             self.append_message("[TARS] Failed to send message")
+            self.finish_trace()
         
         # Return to normal view after a brief delay
         QTimer.singleShot(1000, lambda: self.set_state(self.STATE_NORMAL))
     
-    def on_recording_stopped(self):
-        """Handle recording stopped"""
-        print("[TARS Display] Recording stopped")
-    
     def on_audio_error(self, error):
         """Handle audio errors"""
-        print(f"[TARS Display] Audio error: {error}")
+        log.error("Audio error: %s", error)
         self.append_message(f"[TARS Audio] {error}")
         self.set_state(self.STATE_NORMAL)
+        self.finish_trace()
+    
+    def finish_trace(self):
+        """Write out the current utterance trace, complete or not"""
+        if self.trace is not None:
+            self.trace.finish()
+            self.trace = None
     
     def set_state(self, state):
         """Change display state"""
         if state == self.state:
             return
         
-        print(f"[TARS Display] State: {self.state} -> {state}")
+        log.debug("State: %s -> %s", self.state, state)
         self.state = state
         
         if state == self.STATE_NORMAL:
             # Show conversation view
             self.stack.setCurrentIndex(0)
-            if AUDIO_AVAILABLE and hasattr(self, 'visualizer'):
+            if self.audio_ready:
                 self.visualizer.stop()
         elif state == self.STATE_LISTENING:
             # Show listening view
             self.stack.setCurrentIndex(1)
-            if AUDIO_AVAILABLE and hasattr(self, 'visualizer'):
+            if self.audio_ready:
                 self.visualizer.start()
             self.transcription_label.setText("Listening...")
             self.instruction_label.setText("💬 Speak now (pause to finish)")
@@ -341,25 +378,92 @@ class TarsDisplay(QMainWindow):
         elif state == self.STATE_PROCESSING:
             # Update listening view to show processing
             self.stack.setCurrentIndex(1)
-            if AUDIO_AVAILABLE and hasattr(self, 'visualizer'):
+            if self.audio_ready:
                 self.visualizer.stop()
             self.transcription_label.setText("Processing...")
             self.instruction_label.setText("🤖 Thinking...")
         
     def append_message(self, text):
-        """Append a message to the display"""
+        """Queue a message for the display"""
+        if self.inbox.put(text):
+            self.schedule_drain()
+    
+    def schedule_drain(self):
+        """Apply pending messages on the next frame (coalescing bursts)"""
+        if not self.drain_timer.isActive():
+            self.drain_timer.start()
+    
+    def drain_messages(self):
+        """Apply every pending message as a single batch"""
+        items = self.inbox.take_all()
+        if not items:
+            return
+        
         # If we're in listening/processing state and receiving a message,
         # it's likely a response from OpenClaw - switch to normal view
-        if self.state != self.STATE_NORMAL and not text.startswith(">"):
+        if self.state != self.STATE_NORMAL and any(
+            (item[0] != 'trace') if isinstance(item, tuple) else not item.startswith(">")
+            for item in items
+        ):
             self.set_state(self.STATE_NORMAL)
         
-        self.text_display.append(text)
-        
-        # Auto-scroll to bottom
-        cursor = self.text_display.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.text_display.setTextCursor(cursor)
-        
+        lines = []
+        started = {}  # Reply id -> index in lines, for replies begun in this batch
+        updates = {}  # Line id -> new text, for replies already on screen
+        transcript = self.transcript_view.transcript
+        for item in items:
+            if isinstance(item, str):
+                lines.append(item)
+                continue
+            
+            # Gateway frame: (kind, reply id, text)
+            kind, reply_id, text = item
+            if kind == 'trace':
+                self.on_gateway_trace(reply_id, text)
+                continue
+            if self.trace is not None:
+                self.trace.mark('first_render')
+            if kind == 'message':
+                lines.append(text)  # Whole reply (v1 or non-streaming peer)
+                continue
+            final = kind == 'reply_end'
+            if kind == 'reply_start':
+                started[reply_id] = len(lines)
+                lines.append(text)
+            elif reply_id in started:
+                index = started[reply_id]
+                lines[index] = text if final else lines[index] + text
+            elif reply_id in self.reply_lines:
+                line_id = self.reply_lines[reply_id]
+                current = updates.get(line_id, transcript.line_text(line_id))
+                if current is not None:
+                    updates[line_id] = text if final else current + text
+            elif final:
+                lines.append(text)  # Start was never seen
+            
+            if final:
+                started.pop(reply_id, None)
+                self.reply_lines.pop(reply_id, None)
+        
+        # One model insert and one scroll to the bottom per batch, and none
+        # for batches of traces and in-place reply updates only
+        if lines:
+            first_id = self.transcript_view.append_lines(lines)
+            for reply_id, index in started.items():
+                self.reply_lines[reply_id] = first_id + index
+        self.transcript_view.update_lines(updates)
+        
+    def on_gateway_trace(self, trace_id, stages):
+        """Merge the gateway's stage times and close the utterance trace"""
+        if self.trace is not None and self.trace.trace_id == trace_id:
+            self.trace.merge(stages)
+            self.finish_trace()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup is not None and not self.startup.reported:
+            self.startup.mark('first_paint')
+    
     def keyPressEvent(self, event):
         """Handle key press events"""
         # Allow Ctrl+C or Escape to quit
@@ -369,16 +473,21 @@ class TarsDisplay(QMainWindow):
             
     def closeEvent(self, event):
         """Clean up when closing"""
-        if hasattr(self, 'socket_thread'):
-            self.socket_thread.stop()
-            self.socket_thread.wait()
-        
-        if AUDIO_AVAILABLE:
-            if hasattr(self, 'wake_detector'):
-                self.wake_detector.stop()
-            if hasattr(self, 'audio_recorder') and self.audio_recorder.isRunning():
-                self.audio_recorder.stop_recording()
-                self.audio_recorder.wait()
+        if hasattr(self, 'socket_client'):
+            self.socket_client.stop()
+        self.finish_trace()
+        
+        # A model still loading cannot be interrupted; wait, then discard it
+        self.closing = True
+        if hasattr(self, 'audio_loader'):
+            self.audio_loader.wait()
+        
+        if self.audio_ready:
+            self.audio.stop()
+        elif hasattr(self, 'audio_loader') and self.audio_loader.engine is not None:
+            # loaded() is never delivered once the event loop has quit, so
+            # stop the whisper-server child here rather than orphan it
+            self.audio_loader.engine.stop()
         
         event.accept()
 
@@ -387,13 +496,13 @@ def main():
     """Main entry point"""
     # Socket path (same as OpenClaw will create, or override via CLI arg)
     socket_path = sys.argv[1] if len(sys.argv) > 1 else "/tmp/tars-channel.sock"
-    print(f"[TARS Display] Using socket: {socket_path}", flush=True)
+    log.info("Using socket: %s", socket_path)
     
     # Create Qt application
     app = QApplication(sys.argv)
     
     # Create and show display
-    display = TarsDisplay(socket_path)
+    display = TarsDisplay(socket_path, startup=startup)
     display.show()
     
     # Run
@@ -0,0 +1,108 @@
+"""Logging setup for the TARS display.
+
+Records are formatted and written by a QueueListener thread, so the GUI,
+audio and socket threads only pay for a queue put. Messages use lazy
+%-style arguments, per-message logging sits at DEBUG, and noisy call sites
+are rate limited so a flood cannot saturate journald on the Pi.
+
+    TARS_LOG_LEVEL=DEBUG ./run_display.sh   # turn per-message logs on
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+DEFAULT_LEVEL = "INFO"
+RATE_LIMIT_PER_SITE = 20  # Records per call site per window
+RATE_LIMIT_WINDOW = 10.0  # Seconds
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop records from a call site that logs too often.
+
+    Each (file, line) gets ``limit`` records per ``window`` seconds; the
+    first record after a suppressed stretch notes how many were dropped.
+    """
+
+    def __init__(self, limit=RATE_LIMIT_PER_SITE, window=RATE_LIMIT_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sites = {}  # (pathname, lineno) -> [window_start, count, suppressed]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                self.sites[key] = [now, 1, 0]
+                record.suppressed = suppressed  # Rendered by TarsFormatter
+                return True
+            site[1] += 1
+            if site[1] <= self.limit:
+                return True
+            site[2] += 1
+            return False
+
+
+class TarsFormatter(logging.Formatter):
+    """Formatter that notes records dropped by RateLimitFilter."""
+
+    def formatMessage(self, record):
+        text = super().formatMessage(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" (+{suppressed} similar suppressed)"
+        return text
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock prepare() formats the record (%-interpolation, tracebacks)
+    on the logging thread; this one enqueues the record untouched.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=None):
+    """Install the queued handler on the ``tars`` logger (idempotent)."""
+    global _listener
+    root = logging.getLogger("tars")
+    if _listener is not None:
+        return root
+
+    level = (level or os.environ.get("TARS_LOG_LEVEL") or DEFAULT_LEVEL).upper()
+    root.setLevel(getattr(logging, level, logging.INFO))
+    root.propagate = False
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(TarsFormatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(RateLimitFilter())
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(records, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return root
+
+
+def get_logger(name):
+    """Logger for a display component, e.g. ``get_logger("SocketClient")``."""
+    setup_logging()
+    return logging.getLogger(f"tars.{name}")
@@ -0,0 +1,200 @@
+"""Per-utterance latency tracing for the TARS voice pipeline.
+
+Each utterance gets a Trace whose stages are stamped with time.monotonic()
+(CLOCK_MONOTONIC), the same clock the channel plugin reports its own
+stages in, so display and gateway marks share one timeline. Finished
+traces are appended to a JSONL file, one object per utterance.
+
+Summarize recorded traces with::
+
+    python3 display/tracing.py [traces.jsonl]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+import display_config as dcfg
+from tars_log import get_logger
+
+log = get_logger("Tracing")
+
+# Canonical stage order, used for the stage-to-stage breakdown
+STAGES = [
+    'wake',             # WakeWordDetector fired
+    'speech_start',     # AudioRecorder confirmed speech
+    'pause',            # AudioRecorder detected the end of speech
+    'whisper_start',
+    'whisper_end',
+    'send',             # Input written to the channel socket
+    'gateway_receive',  # TarsServer decoded the input
+    'dispatch_start',   # dispatchReplyWithBufferedBlockDispatcher called
+    'first_reply',      # First reply text sent to the display
+    'first_render',     # First reply text applied to the transcript
+    'reply_end',        # Reply finished on the gateway
+]
+
+_lock = threading.Lock()
+
+
+def now_ms():
+    """Monotonic clock in milliseconds (comparable with the gateway's)."""
+    return time.monotonic() * 1000.0
+
+
+class Trace:
+    """Timestamps for one utterance, keyed by stage name."""
+
+    def __init__(self, trace_id=None, started_ms=None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self.marks = {}
+        self.finished = False
+        if started_ms is not None:
+            self.marks['wake'] = started_ms
+
+    def mark(self, stage, at_ms=None):
+        """Record a stage once; later marks of the same stage are ignored."""
+        if stage not in self.marks:
+            self.marks[stage] = now_ms() if at_ms is None else at_ms
+
+    def merge(self, stages):
+        """Add stages reported by the gateway (absolute monotonic ms)."""
+        for stage, at_ms in stages.items():
+            if isinstance(at_ms, (int, float)):
+                self.marks.setdefault(stage, float(at_ms))
+
+    def offsets(self):
+        """Stage -> milliseconds since the first mark."""
+        if not self.marks:
+            return {}
+        base = min(self.marks.values())
+        ordered = sorted(self.marks.items(), key=lambda item: item[1])
+        return {stage: round(at - base, 1) for stage, at in ordered}
+
+    def finish(self):
+        """Append the trace to the JSONL file (once)."""
+        if self.finished or not self.marks:
+            return
+        self.finished = True
+        if not dcfg.TRACE_ENABLED:
+            return
+
+        record = {'trace_id': self.trace_id, 'time': time.time(), 'stages': self.offsets()}
+        path = os.path.expanduser(dcfg.TRACE_PATH)
+        try:
+            with _lock:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            log.warning("Could not write trace: %s", e)
+
+
+def process_started_ms():
+    """Monotonic ms at which this process was created (None if unknown)."""
+    try:
+        with open('/proc/self/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+    return now_ms() - (uptime - started) * 1000.0
+
+
+class StartupTimer:
+    """Milestones from process start until the display is fully up.
+
+    Stages are milliseconds since the process was created. The breakdown
+    is logged once every expected stage has been reached.
+    """
+
+    def __init__(self, expect=()):
+        self.started_ms = process_started_ms() or now_ms()
+        self.marks = {}
+        self.expect = set(expect)
+        self.reported = False
+
+    def mark(self, stage):
+        if stage in self.marks:
+            return
+        self.marks[stage] = now_ms() - self.started_ms
+        log.debug("Startup stage %s at %.0f ms", stage, self.marks[stage])
+        self.check()
+
+    def skip(self, stage):
+        """Stop waiting for a stage that will never happen."""
+        self.expect.discard(stage)
+        self.check()
+
+    def check(self):
+        if not self.reported and self.expect <= set(self.marks):
+            self.reported = True
+            log.info("Startup: %s", ", ".join(
+                f"{stage} {ms:.0f} ms" for stage, ms in sorted(self.marks.items(), key=lambda item: item[1])
+            ))
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return None
+    k = (len(values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def summarize(records):
+    """p50/p95 of each stage's offset and of each step between stages."""
+    offsets = {}
+    steps = {}
+    for record in records:
+        stages = record.get('stages', {})
+        for stage, ms in stages.items():
+            offsets.setdefault(stage, []).append(ms)
+        present = [s for s in STAGES if s in stages]
+        for prev, cur in zip(present, present[1:]):
+            steps.setdefault(f"{prev} -> {cur}", []).append(stages[cur] - stages[prev])
+
+    def table(data, order):
+        rows = []
+        for key in order:
+            if key in data:
+                values = data[key]
+                rows.append((key, len(values), _percentile(values, 50), _percentile(values, 95)))
+        return rows
+
+    step_order = [f"{a} -> {b}" for i, a in enumerate(STAGES) for b in STAGES[i + 1:]]
+    return {
+        'offsets': table(offsets, STAGES + sorted(set(offsets) - set(STAGES))),
+        'steps': table(steps, step_order),
+    }
+
+
+def main(argv):
+    path = os.path.expanduser(argv[1] if len(argv) > 1 else dcfg.TRACE_PATH)
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass
+
+    summary = summarize(records)
+    print(f"{len(records)} traces from {path}\n")
+    for title, rows in (("Since first mark", summary['offsets']), ("Stage to stage", summary['steps'])):
+        print(f"{title:<34} {'n':>5} {'p50 ms':>10} {'p95 ms':>10}")
+        for key, n, p50, p95 in rows:
+            print(f"{key:<34} {n:>5} {p50:>10.1f} {p95:>10.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
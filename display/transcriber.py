@@ -0,0 +1,212 @@
+"""Resident Whisper transcription engine for TARS voice input.
+
+Runs whisper.cpp's ``whisper-server`` as a long-lived child process so the
+model is loaded from disk once at startup instead of once per utterance.
+PCM buffers are streamed to it over a loopback HTTP socket. The process is
+restarted with backoff if it dies; callers fall back to ``whisper-cli``
+when the engine is unavailable.
+"""
+
+import json
+import os
+import re
+import socket
+import struct
+import subprocess
+import threading
+import time
+import uuid
+import http.client
+import audio_config as cfg
+from tars_log import get_logger
+
+log = get_logger("Whisper")
+
+
+class WhisperServerError(Exception):
+    """The resident engine could not produce a transcription."""
+
+
+def wav_header(data_bytes):
+    """44-byte canonical WAV header for ``data_bytes`` of 16-bit PCM.
+
+    Sent ahead of the raw samples so the capture buffer can be streamed to
+    whisper as-is, without building a second WAV copy in memory.
+    """
+    byte_rate = cfg.SAMPLE_RATE * cfg.CHANNELS * 2
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_bytes, b'WAVE',
+        b'fmt ', 16, 1, cfg.CHANNELS, cfg.SAMPLE_RATE, byte_rate,
+        cfg.CHANNELS * 2, 16,
+        b'data', data_bytes,
+    )
+
+
+def clean_transcript(output):
+    """Strip timestamps/markers from whisper output, None if nothing left."""
+    lines = [line.strip() for line in output.split('\n') if line.strip()]
+    text_lines = [line for line in lines if not line.startswith('[')]
+    text = ' '.join(text_lines).strip()
+    return text if text and text != "[BLANK_AUDIO]" else None
+
+
+def strip_wake_phrase(text):
+    """Drop a leading wake phrase picked up by the pre-roll, None if empty."""
+    if not text or not cfg.STRIP_WAKE_PHRASE:
+        return text
+    words = [re.escape(word) for word in cfg.WAKE_PHRASE.split()]
+    pattern = r'^\W*' + r'\W+'.join(words) + r'\b\W*'
+    text = re.sub(pattern, '', text, count=1, flags=re.IGNORECASE).strip()
+    return text or None
+
+
+class WhisperEngine:
+    """Long-lived whisper.cpp server process with crash recovery."""
+
+    def __init__(self):
+        self.host = cfg.WHISPER_SERVER_HOST
+        self.port = cfg.WHISPER_SERVER_PORT
+        self.process = None
+        self.restarts = 0
+        self.lock = threading.Lock()
+        self._ready = False
+        self._backoff = cfg.WHISPER_SERVER_RESTART_BACKOFF
+        self._next_start = 0.0
+
+    def available(self):
+        """Whether the server binary and model are installed."""
+        return (os.path.exists(os.path.expanduser(cfg.WHISPER_SERVER_PATH)) and
+                os.path.exists(os.path.expanduser(cfg.WHISPER_MODEL_PATH)))
+
+    def start(self):
+        """Spawn the server process (model loading continues in the child)."""
+        with self.lock:
+            return self._spawn()
+
+    def _spawn(self):
+        if self.process and self.process.poll() is None:
+            return True
+        if not self.available():
+            return False
+        if time.monotonic() < self._next_start:
+            return False
+
+        if self.process is not None:
+            self.restarts += 1
+            log.warning("Engine exited (%s), restarting (restart #%d)",
+                        self.process.returncode, self.restarts)
+
+        self._ready = False
+        try:
+            self.process = subprocess.Popen(
+                [os.path.expanduser(cfg.WHISPER_SERVER_PATH),
+                 '-m', os.path.expanduser(cfg.WHISPER_MODEL_PATH),
+                 '--host', self.host,
+                 '--port', str(self.port),
+                 '-t', str(cfg.WHISPER_SERVER_THREADS)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            log.error("Failed to start engine: %s", e)
+            self._schedule_retry()
+            return False
+
+        return True
+
+    def _schedule_retry(self):
+        self._next_start = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, cfg.WHISPER_SERVER_RESTART_BACKOFF_MAX)
+
+    def _wait_ready(self):
+        """Block until the server accepts connections (model loaded)."""
+        if self._ready:
+            return True
+
+        deadline = time.monotonic() + cfg.WHISPER_SERVER_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                return False
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.5):
+                    pass
+                self._ready = True
+                self._backoff = cfg.WHISPER_SERVER_RESTART_BACKOFF
+                log.info("Engine ready")
+                return True
+            except OSError:
+                time.sleep(0.1)
+
+        return False
+
+    def transcribe(self, pcm):
+        """Transcribe raw PCM; raise WhisperServerError if the engine fails."""
+        with self.lock:
+            if not self._spawn():
+                raise WhisperServerError("engine not running")
+            if not self._wait_ready():
+                self._kill()
+                self._schedule_retry()
+                raise WhisperServerError("engine did not become ready")
+
+            try:
+                return self._post(pcm)
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                # Connection-level failure usually means the process died
+                if self.process.poll() is not None:
+                    self._ready = False
+                raise WhisperServerError(str(e)) from e
+
+    def _post(self, pcm):
+        """POST a WAV body to /inference and return the cleaned text."""
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in (('response_format', 'json'), ('temperature', '0.0')):
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'.encode()
+            )
+        parts.append(
+            f'--{boundary}\r\n'
+            'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n'
+            'Content-Type: audio/wav\r\n\r\n'.encode()
+        )
+        parts.append(wav_header(len(pcm)))
+        parts.append(pcm)
+        parts.append(f'\r\n--{boundary}--\r\n'.encode())
+
+        # The body is streamed part by part so the samples are sent straight
+        # from the recorder's buffer instead of being joined into a copy
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=cfg.WHISPER_TIMEOUT)
+        try:
+            conn.request('POST', '/inference', body=parts, headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+                'Content-Length': str(sum(len(part) for part in parts)),
+            })
+            response = conn.getresponse()
+            payload = response.read()
+        finally:
+            conn.close()
+
+        if response.status != 200:
+            raise WhisperServerError(f"HTTP {response.status}: {payload[:200]!r}")
+
+        result = json.loads(payload)
+        return clean_transcript(result.get('text', ''))
+
+    def _kill(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._ready = False
+
+    def stop(self):
+        """Shut the server down."""
+        with self.lock:
+            self._kill()
+            self.process = None
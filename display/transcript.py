@@ -0,0 +1,195 @@
+"""Bounded, virtualized transcript view for the TARS display.
+
+The display runs for days at a time, so the conversation is kept in a list
+model with a fixed retention cap instead of an ever-growing QTextDocument.
+The view only lays out and paints the rows that are visible, and each
+message's wrapped QTextLayout is cached until the width changes or the row
+is dropped.
+"""
+
+from collections import deque
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QPointF, QSize
+from PyQt5.QtGui import QColor, QPalette, QTextLayout
+import display_config as dcfg
+
+# Custom role exposing the stable per-message id (rows shift as old ones drop)
+LineIdRole = Qt.UserRole + 1
+
+
+class TranscriptModel(QAbstractListModel):
+    """List of transcript lines, trimmed to ``max_lines``."""
+
+    def __init__(self, max_lines=dcfg.TRANSCRIPT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.lines = deque()  # [line_id, text] pairs, oldest first
+        self.next_id = 0
+        self.on_lines_dropped = None  # Called with the ids of trimmed lines
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        line_id, text = self.lines[index.row()]
+        if role == Qt.DisplayRole:
+            return text
+        if role == LineIdRole:
+            return line_id
+        return None
+
+    def row_of(self, line_id):
+        """Current row of a line id, or -1 once it has been trimmed."""
+        if not self.lines:
+            return -1
+        row = line_id - self.lines[0][0]  # Ids are consecutive
+        return row if 0 <= row < len(self.lines) else -1
+
+    def line_text(self, line_id):
+        row = self.row_of(line_id)
+        return self.lines[row][1] if row >= 0 else None
+
+    def update_line(self, line_id, text):
+        """Replace a line's text in place; False if it is gone."""
+        row = self.row_of(line_id)
+        if row < 0:
+            return False
+        self.lines[row][1] = text
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def append_lines(self, texts):
+        """Append a batch of lines with one insert (and at most one remove).
+
+        Returns the id of the first appended line.
+        """
+        if not texts:
+            return None
+
+        first = len(self.lines)
+        first_id = self.next_id
+        self.beginInsertRows(QModelIndex(), first, first + len(texts) - 1)
+        for text in texts:
+            self.lines.append([self.next_id, text])
+            self.next_id += 1
+        self.endInsertRows()
+
+        excess = len(self.lines) - self.max_lines
+        if excess > 0:
+            self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+            dropped = [self.lines.popleft()[0] for _ in range(excess)]
+            self.endRemoveRows()
+            if self.on_lines_dropped:
+                self.on_lines_dropped(dropped)
+        return first_id
+
+
+class TranscriptDelegate(QStyledItemDelegate):
+    """Paints rows from cached, word-wrapped QTextLayouts."""
+
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.font = font
+        self.color = QColor(dcfg.TEXT_COLOR)
+        self.margin = dcfg.TRANSCRIPT_MARGIN
+        self.cache = {}  # line_id -> (text, QTextLayout, QSize)
+        self.width = -1
+
+    def forget(self, line_ids):
+        """Drop cached layouts for lines that left the model."""
+        for line_id in line_ids:
+            self.cache.pop(line_id, None)
+
+    def _layout(self, index, width):
+        """Return the (layout, size) for a row, building it if needed."""
+        if width != self.width:
+            # Re-wrap everything lazily at the new width
+            self.cache.clear()
+            self.width = width
+
+        # Read the model's row directly: every row is asked for its size
+        # whenever the view re-lays out, so avoid two QVariant round trips
+        line_id, text = index.model().lines[index.row()]
+        cached = self.cache.get(line_id)
+        if cached is not None and cached[0] == text:
+            return cached[1], cached[2]
+
+        layout = QTextLayout(text, self.font)
+        layout.setCacheEnabled(True)
+        line_width = max(1, width - 2 * self.margin)
+        height = 0.0
+        layout.beginLayout()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(line_width)
+            line.setPosition(QPointF(0, height))
+            height += line.height()
+        layout.endLayout()
+
+        size = QSize(width, int(height + 0.999))
+        self.cache[line_id] = (text, layout, size)
+        return layout, size
+
+    def _width(self, option):
+        # One width for sizing and painting, or each would flush the cache
+        return self.parent().viewport().width() if self.parent() else option.rect.width()
+
+    def sizeHint(self, option, index):
+        return self._layout(index, self._width(option))[1]
+
+    def paint(self, painter, option, index):
+        layout, _ = self._layout(index, self._width(option))
+        painter.save()
+        painter.setPen(self.color)
+        layout.draw(painter, QPointF(option.rect.left() + self.margin, option.rect.top()))
+        painter.restore()
+
+
+class TranscriptView(QListView):
+    """Read-only, auto-scrolling transcript list."""
+
+    def __init__(self, font, max_lines=dcfg.TRANSCRIPT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.transcript = TranscriptModel(max_lines, self)
+        self.delegate = TranscriptDelegate(font, self)
+        self.transcript.on_lines_dropped = self.delegate.forget
+
+        self.setModel(self.transcript)
+        self.setItemDelegate(self.delegate)
+        self.setUniformItemSizes(False)
+        self.setResizeMode(QListView.Adjust)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setFrameStyle(0)
+
+        palette = self.palette()
+        palette.setColor(QPalette.Base, QColor(dcfg.BACKGROUND_COLOR))
+        palette.setColor(QPalette.Text, QColor(dcfg.TEXT_COLOR))
+        self.setPalette(palette)
+        self.setFont(font)
+
+    def append_lines(self, texts):
+        """Append a batch of lines and scroll to the bottom once."""
+        if not texts:
+            return None
+        first_id = self.transcript.append_lines(texts)
+        self.scrollToBottom()
+        return first_id
+
+    def update_lines(self, updates):
+        """Rewrite lines in place ({line_id: text}) and re-layout once."""
+        changed = False
+        for line_id, text in updates.items():
+            changed = self.transcript.update_line(line_id, text) or changed
+        if changed:
+            # Row heights may have changed as the text grew
+            self.scheduleDelayedItemsLayout()
+            self.scrollToBottom()
@@ -1,30 +1,54 @@
 """Smooth waveform audio visualizer for TARS display.
 
-Draws a flowing sine-wave style visualization with glow effects
-using only QPainter — no external dependencies needed.
+Draws a flowing sine-wave style visualization with glow effects using
+QPainter. Wave points are computed with NumPy straight into reusable
+QPolygonF buffers at a capped point count.
 """
 
 import math
-from collections import deque
+import time
+import numpy as np
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QTimer, QPointF
-from PyQt5.QtGui import (
-    QPainter, QColor, QPen, QPainterPath,
-    QLinearGradient, QRadialGradient
-)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QPainter, QColor, QPen, QPixmap, QPolygonF
 import audio_config as cfg
 
 
+class LevelMeter:
+    """Ring of recent audio levels shared between threads.
+
+    The audio thread writes one value per chunk with ``push``; the
+    visualizer samples the whole history once per frame with ``snapshot``.
+    This replaces queueing a cross-thread signal for every 30ms chunk.
+    """
+
+    def __init__(self, size=cfg.VIS_HISTORY):
+        self.levels = np.zeros(size, dtype=np.float32)
+        self.count = 0  # Total levels written
+
+    def push(self, level):
+        """Record a new level (0.0 - 1.0). Called from the audio thread."""
+        self.levels[self.count % len(self.levels)] = min(1.0, max(0.0, level))
+        self.count += 1
+
+    def snapshot(self):
+        """Levels ordered oldest to newest."""
+        return np.roll(self.levels, -(self.count % len(self.levels)))
+
+    def reset(self):
+        """Forget the history."""
+        self.levels[:] = 0.0
+        self.count = 0
+
+
 class AudioVisualizer(QWidget):
     """Smooth flowing waveform visualizer with glow effect."""
 
-    def __init__(self, parent=None):
+    def __init__(self, meter=None, parent=None):
         super().__init__(parent)
 
-        # Audio level history
-        self.levels = deque(maxlen=cfg.VIS_HISTORY)
-        for _ in range(cfg.VIS_HISTORY):
-            self.levels.append(0.0)
+        # Audio level history (written directly by the recorder thread)
+        self.meter = meter if meter is not None else LevelMeter()
 
         # Animation phase (scrolls the wave)
         self.phase = 0.0
@@ -37,6 +61,45 @@ class AudioVisualizer(QWidget):
         self.dim_color = QColor(cfg.VIS_COLOR)
         self.dim_color.setAlpha(100)
 
+        # Pens are built once instead of on every paintEvent
+        center_color = QColor(cfg.VIS_COLOR)
+        center_color.setAlpha(30)
+        self.center_pen = self._make_pen(center_color, 1)
+        self.med_pen = self._make_pen(self.dim_color, 4)
+        self.sharp_pen = self._make_pen(self.primary, 2)
+        harm_color = QColor(cfg.VIS_COLOR)
+        harm_color.setAlpha(50)
+        self.harm_pen = self._make_pen(harm_color, 1)
+
+        # Cached layers: background + center line (rebuilt on resize) and a
+        # reduced-resolution glow buffer that is scaled up when drawn
+        self._static = None
+        self._glow = None
+        self._glow_y = None  # Wave y values the glow was last drawn from
+        self.glow_pen = self._make_pen(self.glow_color, 12)
+
+        # Reusable wave geometry, rebuilt only when the width changes
+        self._geometry_width = -1
+        self._xnorm = None
+        self._level_index = None
+        self._wave = None
+        self._wave_xy = None
+        self._harmonic = None
+        self._harmonic_xy = None
+
+        # Adaptive frame rate: full rate while levels move, idle rate otherwise
+        self.levels = self.meter.snapshot()
+        self.idle_frames = 0
+        self.fps = cfg.VIS_FPS
+        self._last_tick = None
+
+        # Frame-time budget: shed optional layers when painting runs long
+        self.frame_ms = 0.0  # Exponential moving average
+        self.frame_ms_max = 0.0
+        self.frames = 0
+        self.over_budget = 0
+        self.quality = 2  # 2 = all layers, 1 = no harmonic, 0 = no glow either
+
         # Update timer
         self.timer = QTimer()
         self.timer.timeout.connect(self._tick)
@@ -47,111 +110,210 @@ class AudioVisualizer(QWidget):
         palette.setColor(self.backgroundRole(), self.bg_color)
         self.setPalette(palette)
 
+    @staticmethod
+    def _make_pen(color, width):
+        pen = QPen(color)
+        pen.setWidth(width)
+        pen.setCapStyle(Qt.RoundCap)
+        pen.setJoinStyle(Qt.RoundJoin)
+        return pen
+
     def start(self):
         """Start the visualizer animation."""
-        update_interval = int(1000 / cfg.VIS_FPS)
-        self.timer.start(update_interval)
+        self.fps = cfg.VIS_FPS
+        self.idle_frames = 0
+        self._last_tick = None
+        self.timer.start(int(1000 / self.fps))
 
     def stop(self):
         """Stop the visualizer and reset."""
         self.timer.stop()
-        self.levels.clear()
-        for _ in range(cfg.VIS_HISTORY):
-            self.levels.append(0.0)
+        self.meter.reset()
+        self.levels = self.meter.snapshot()
         self.phase = 0.0
         self.update()
 
+    def frame_stats(self):
+        """Frame timing summary for monitoring and benchmarks."""
+        return {
+            'fps': self.fps,
+            'frames': self.frames,
+            'frame_ms': round(self.frame_ms, 3),
+            'frame_ms_max': round(self.frame_ms_max, 3),
+            'over_budget': self.over_budget,
+            'quality': self.quality,
+        }
+
     def add_level(self, level):
         """Add a new audio level (0.0 - 1.0)."""
-        self.levels.append(min(1.0, max(0.0, level)))
+        self.meter.push(level)
 
     def _tick(self):
-        """Advance animation phase and repaint."""
-        self.phase += 0.08
+        """Sample levels, adapt the frame rate, advance phase and repaint."""
+        now = time.monotonic()
+        elapsed = (now - self._last_tick) if self._last_tick else 1.0 / cfg.VIS_FPS
+        self._last_tick = now
+
+        # Keep the scroll speed constant whatever the current frame rate
+        self.phase += 0.08 * elapsed * cfg.VIS_FPS
+
+        levels = self.meter.snapshot()
+        change = float(np.max(np.abs(levels - self.levels)))
+        self.levels = levels
+
+        if change > cfg.VIS_ACTIVITY_THRESHOLD:
+            self.idle_frames = 0
+            self._set_fps(cfg.VIS_FPS)
+        else:
+            self.idle_frames += 1
+            if self.idle_frames >= cfg.VIS_IDLE_AFTER_FRAMES:
+                self._set_fps(cfg.VIS_IDLE_FPS)
+
         self.update()
 
-    def _build_wave(self, width, height, center_y, amplitude_scale, freq_mult, phase_offset):
-        """Build a smooth sine-wave path modulated by audio levels."""
-        path = QPainterPath()
-        num_points = width
-        levels_list = list(self.levels)
-        num_levels = len(levels_list)
+    def _set_fps(self, fps):
+        if fps != self.fps:
+            self.fps = fps
+            self.timer.setInterval(int(1000 / fps))
+
+    def _record_frame_time(self, ms):
+        """Track paint cost and step quality down/up against the budget."""
+        self.frames += 1
+        self.frame_ms = ms if self.frames == 1 else self.frame_ms * 0.9 + ms * 0.1
+        self.frame_ms_max = max(self.frame_ms_max, ms)
+
+        if ms > cfg.VIS_FRAME_BUDGET_MS:
+            self.over_budget += 1
+
+        # Re-evaluate roughly once a second so quality does not flap
+        if self.frames % cfg.VIS_FPS:
+            return
+        if self.frame_ms > cfg.VIS_FRAME_BUDGET_MS and self.quality > 0:
+            self.quality -= 1
+        elif self.frame_ms < cfg.VIS_FRAME_BUDGET_MS * 0.4 and self.quality < 2:
+            self.quality += 1
 
-        for x in range(num_points):
-            # Map x position to a level index
-            li = int(x / width * num_levels)
-            li = min(li, num_levels - 1)
-            level = levels_list[li]
+    def resizeEvent(self, event):
+        """Drop cached layers; they are rebuilt lazily at the new size."""
+        self._static = None
+        self._glow = None
+        self._glow_y = None
+        super().resizeEvent(event)
 
-            # Base amplitude from audio level, with a small idle wobble
-            amp = (level * 0.85 + 0.02) * (height * 0.4) * amplitude_scale
+    def _static_layer(self, w, h):
+        """Background and center line, pre-rendered once per size."""
+        if self._static is None or self._static.size() != self.size():
+            self._static = QPixmap(self.size())
+            self._static.fill(self.bg_color)
+            painter = QPainter(self._static)
+            painter.setPen(self.center_pen)
+            cy = int(h / 2.0)
+            painter.drawLine(0, cy, w, cy)
+            painter.end()
+        return self._static
 
-            # Sine wave
-            y = center_y + amp * math.sin(
-                (x / width) * math.pi * freq_mult + self.phase + phase_offset
-            )
+    def _glow_layer(self, w, h):
+        """Render the wide glow stroke into a small pixmap for upscaling.
 
-            if x == 0:
-                path.moveTo(x, y)
-            else:
-                path.lineTo(x, y)
+        The pixmap is reused while the wave has not moved by a visible
+        amount at glow resolution (e.g. the slow idle drift).
+        """
+        scale = cfg.VIS_GLOW_SCALE
+        y = self._wave_xy[:, 1]
+        if (self._glow is not None and self._glow_y is not None and len(self._glow_y) == len(y)
+                and float(np.max(np.abs(y - self._glow_y))) < cfg.VIS_GLOW_REUSE_PX * scale):
+            return self._glow
 
-        return path
+        if self._glow is None:
+            self._glow = QPixmap(max(1, w // scale), max(1, h // scale))
+        self._glow.fill(Qt.transparent)
+        if self._glow_y is None or len(self._glow_y) != len(y):
+            self._glow_y = np.empty_like(y)
+        np.copyto(self._glow_y, y)
+
+        painter = QPainter(self._glow)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(self._glow.width() / max(w, 1), self._glow.height() / max(h, 1))
+        painter.setPen(self.glow_pen)
+        painter.drawPolyline(self._wave)
+        painter.end()
+        return self._glow
+
+    @staticmethod
+    def _polygon_view(polygon, count):
+        """Writable (count, 2) float64 NumPy view onto a QPolygonF's points."""
+        ptr = polygon.data()
+        ptr.setsize(count * 2 * 8)
+        return np.frombuffer(ptr, dtype=np.float64).reshape(count, 2)
+
+    def _ensure_geometry(self, width):
+        """(Re)allocate the point buffers for the current width."""
+        if width == self._geometry_width:
+            return
+
+        count = max(2, min(width, cfg.VIS_MAX_POINTS))
+        x = np.linspace(0.0, width, count)
+        self._xnorm = x / max(width, 1)
+        num_levels = len(self.meter.levels)
+        self._level_index = np.minimum(
+            (self._xnorm * num_levels).astype(np.intp), num_levels - 1
+        )
+
+        self._wave = QPolygonF(count)
+        self._wave_xy = self._polygon_view(self._wave, count)
+        self._wave_xy[:, 0] = x
+        self._harmonic = QPolygonF(count)
+        self._harmonic_xy = self._polygon_view(self._harmonic, count)
+        self._harmonic_xy[:, 0] = x
+        self._geometry_width = width
+
+    def _build_wave(self, xy, levels, height, center_y, amplitude_scale, freq_mult, phase_offset):
+        """Fill a polygon's y values with a sine wave modulated by audio levels."""
+        level = levels[self._level_index]
+
+        # Base amplitude from audio level, with a small idle wobble
+        amp = (level * 0.85 + 0.02) * (height * 0.4) * amplitude_scale
+
+        # Sine wave
+        xy[:, 1] = center_y + amp * np.sin(
+            self._xnorm * (math.pi * freq_mult) + (self.phase + phase_offset)
+        )
 
     def paintEvent(self, event):
         """Draw layered glowing waveforms."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        started = time.perf_counter()
 
         w = self.width()
         h = self.height()
         cy = h / 2.0
 
-        # Background
-        painter.fillRect(self.rect(), self.bg_color)
-
-        # Draw a subtle center line
-        center_pen = QPen(QColor(cfg.VIS_COLOR))
-        center_pen.setWidth(1)
-        center_pen_color = QColor(cfg.VIS_COLOR)
-        center_pen_color.setAlpha(30)
-        center_pen.setColor(center_pen_color)
-        painter.setPen(center_pen)
-        painter.drawLine(0, int(cy), w, int(cy))
-
-        # Layer 1: Wide glow (blurred effect via thick translucent line)
-        glow_path = self._build_wave(w, h, cy, 1.0, 4.0, 0)
-        glow_pen = QPen(self.glow_color)
-        glow_pen.setWidth(12)
-        glow_pen.setCapStyle(Qt.RoundCap)
-        glow_pen.setJoinStyle(Qt.RoundJoin)
-        painter.setPen(glow_pen)
-        painter.drawPath(glow_path)
-
-        # Layer 2: Medium glow
-        med_pen = QPen(self.dim_color)
-        med_pen.setWidth(4)
-        med_pen.setCapStyle(Qt.RoundCap)
-        med_pen.setJoinStyle(Qt.RoundJoin)
-        painter.setPen(med_pen)
-        painter.drawPath(glow_path)
-
-        # Layer 3: Sharp primary line
-        sharp_pen = QPen(self.primary)
-        sharp_pen.setWidth(2)
-        sharp_pen.setCapStyle(Qt.RoundCap)
-        sharp_pen.setJoinStyle(Qt.RoundJoin)
-        painter.setPen(sharp_pen)
-        painter.drawPath(glow_path)
+        self._ensure_geometry(w)
+        levels = self.levels
+
+        painter = QPainter(self)
+
+        # Background and center line
+        painter.drawPixmap(0, 0, self._static_layer(w, h))
+
+        self._build_wave(self._wave_xy, levels, h, cy, 1.0, 4.0, 0)
+
+        # Layer 1: Wide glow, rendered small and scaled up (soft edges)
+        if self.quality > 0:
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawPixmap(self.rect(), self._glow_layer(w, h))
+
+        # Layers 2-3: Medium glow and sharp primary line
+        painter.setRenderHint(QPainter.Antialiasing)
+        for pen in (self.med_pen, self.sharp_pen):
+            painter.setPen(pen)
+            painter.drawPolyline(self._wave)
 
         # Layer 4: Secondary harmonic (subtle)
-        harmonic = self._build_wave(w, h, cy, 0.5, 7.0, 1.5)
-        harm_pen = QPen(QColor(cfg.VIS_COLOR))
-        harm_color = QColor(cfg.VIS_COLOR)
-        harm_color.setAlpha(50)
-        harm_pen.setColor(harm_color)
-        harm_pen.setWidth(1)
-        painter.setPen(harm_pen)
-        painter.drawPath(harmonic)
+        if self.quality > 1:
+            self._build_wave(self._harmonic_xy, levels, h, cy, 0.5, 7.0, 1.5)
+            painter.setPen(self.harm_pen)
+            painter.drawPolyline(self._harmonic)
 
         painter.end()
+
+        self._record_frame_time((time.perf_counter() - started) * 1000.0)
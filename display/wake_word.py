@@ -2,92 +2,184 @@
 
 import json
 import os
-import pyaudio
+import threading
 from vosk import Model, KaldiRecognizer
 from PyQt5.QtCore import QThread, pyqtSignal
 import audio_config as cfg
+from speech_gate import SpeechGate
+import tracing
+from tars_log import get_logger
+
+log = get_logger("WakeWord")
+
+
+def load_model():
+    """Load the Vosk model (takes seconds on a Pi)."""
+    if not os.path.exists(cfg.VOSK_MODEL_PATH):
+        raise FileNotFoundError(
+            f"Vosk model not found at {cfg.VOSK_MODEL_PATH}. "
+            "Please download it first."
+        )
+    return Model(cfg.VOSK_MODEL_PATH)
 
 
 class WakeWordDetector(QThread):
     """Background thread for continuous wake word detection."""
     
     wake_word_detected = pyqtSignal()
+    ready = pyqtSignal()  # Model loaded, listening
     error = pyqtSignal(str)
     
-    def __init__(self):
+    def __init__(self, bus, model=None):
         super().__init__()
+        self.bus = bus
         self.running = False
-        self.model = None
+        self.model = model
         self.recognizer = None
-        self.audio = None
-        self.stream = None
-        
+        self.partial_hits = 0
+        self.detected_at = None  # Monotonic ms of the last detection
+        self.gate = SpeechGate() if cfg.GATE_ENABLED else None
+        self.active = threading.Event()
+        self.active.set()
+    
     def initialize(self):
-        """Initialize Vosk model and audio stream."""
+        """Initialize Vosk model and recognizer."""
         try:
-            # Check if model exists
-            if not os.path.exists(cfg.VOSK_MODEL_PATH):
-                raise FileNotFoundError(
-                    f"Vosk model not found at {cfg.VOSK_MODEL_PATH}. "
-                    "Please download it first."
-                )
-            
-            # Load Vosk model
-            self.model = Model(cfg.VOSK_MODEL_PATH)
-            self.recognizer = KaldiRecognizer(self.model, cfg.SAMPLE_RATE)
-            
-            # Set up audio stream
-            self.audio = pyaudio.PyAudio()
-            self.stream = self.audio.open(
-                format=pyaudio.paInt16,
-                channels=cfg.CHANNELS,
-                rate=cfg.SAMPLE_RATE,
-                input=True,
-                frames_per_buffer=cfg.CHUNK_SIZE
-            )
+            # The display normally hands over a model loaded in the background
+            if self.model is None:
+                self.model = load_model()
+            # Both stay resident across restarts; a restart only resets state
+            if self.recognizer is None:
+                self.recognizer = self.create_recognizer()
+            else:
+                self.reset()
             
             return True
-            
+        
         except Exception as e:
             self.error.emit(f"Failed to initialize wake word detector: {e}")
             return False
     
+    def create_recognizer(self):
+        """Build the wake recognizer, grammar-restricted when enabled."""
+        if cfg.WAKE_GRAMMAR:
+            # Only the wake phrase and a garbage token can be decoded, which
+            # shrinks the search graph and makes partial results reliable
+            grammar = json.dumps([cfg.WAKE_PHRASE, "[unk]"])
+            return KaldiRecognizer(self.model, cfg.SAMPLE_RATE, grammar)
+        return KaldiRecognizer(self.model, cfg.SAMPLE_RATE)
+    
     def run(self):
         """Main loop - continuously listen for wake word."""
         if not self.initialize():
             return
         
         self.running = True
+        reader = self.bus.subscribe()
+        self.ready.emit()
         
         while self.running:
             try:
-                # Read audio chunk
-                data = self.stream.read(cfg.CHUNK_SIZE, exception_on_overflow=False)
+                # Skip decoding entirely while a recording owns the audio
+                if not self.active.is_set():
+                    self.active.wait(0.1)
+                    if self.active.is_set():
+                        reader.skip_to_latest()
+                        self.reset()
+                    continue
+                
+                # Read audio chunk from the shared capture bus
+                data = reader.read(timeout=0.1)
+                if data is None:
+                    if self.bus.ring.closed:
+                        break
+                    continue
                 
-                # Process with Vosk
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '').lower()
-                    
-                    # Check for wake phrase
-                    if cfg.WAKE_PHRASE in text:
-                        print(f"[WakeWord] Detected: {text}")
-                        self.wake_word_detected.emit()
-                        
+                # Process with Vosk (silence is dropped by the pre-gate)
+                if self.feed(data):
+                    self.detected_at = tracing.now_ms()  # Start of the utterance trace
+                    self.pause()
+                    self.wake_word_detected.emit()
+            
             except Exception as e:
                 if self.running:  # Only emit error if not shutting down
                     self.error.emit(f"Wake word detection error: {e}")
                 break
     
-    def stop(self):
-        """Stop the wake word detector."""
-        self.running = False
+    def feed(self, data):
+        """Gate a captured frame and decode it if it might contain speech."""
+        if self.gate is None:
+            return self.process_frame(data)
         
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        was_open = self.gate.open
+        for frame in self.gate.process(data):
+            if self.process_frame(frame):
+                return True
         
-        if self.audio:
-            self.audio.terminate()
+        if was_open and not self.gate.open:
+            # Gate closed - no more audio is coming, so finalize the utterance
+            return self.flush()
+        return False
+    
+    def flush(self):
+        """Force a final result for buffered audio, True on wake phrase."""
+        self.partial_hits = 0
+        result = json.loads(self.recognizer.FinalResult())
+        text = result.get('text', '').lower()
+        if cfg.WAKE_PHRASE in text:
+            log.info("Detected: %s", text)
+            return True
+        return False
+    
+    def reset(self):
+        """Drop any in-progress decoding state."""
+        self.recognizer.Reset()
+        self.partial_hits = 0
+        if self.gate is not None:
+            self.gate.reset()
+    
+    def process_frame(self, data):
+        """Feed one frame to the recognizer, True when the wake phrase fires."""
+        if self.recognizer.AcceptWaveform(data):
+            self.partial_hits = 0
+            result = json.loads(self.recognizer.Result())
+            text = result.get('text', '').lower()
+            
+            # Check for wake phrase
+            if cfg.WAKE_PHRASE in text:
+                log.info("Detected: %s", text)
+                return True
+            return False
+        
+        if not cfg.WAKE_GRAMMAR:
+            return False
+        
+        # Early trigger: fire once the partial hypothesis has held the wake
+        # phrase for a few frames instead of waiting for Vosk's endpointing
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '').lower()
+        if cfg.WAKE_PHRASE not in partial:
+            self.partial_hits = 0
+            return False
         
+        self.partial_hits += 1
+        if self.partial_hits < cfg.WAKE_PARTIAL_FRAMES:
+            return False
+        
+        log.info("Detected (partial): %s", partial)
+        self.partial_hits = 0
+        self.recognizer.Reset()
+        return True
+    
+    def pause(self):
+        """Suspend decoding (e.g. while a recording is active)."""
+        self.active.clear()
+    
+    def resume(self):
+        """Resume decoding from the live edge of the capture bus."""
+        self.active.set()
+    
+    def stop(self):
+        """Stop the wake word detector."""
+        self.running = False
+        self.active.set()
         self.wait()  # Wait for thread to finish
@@ -5,9 +5,13 @@ import {
   createReplyPrefixOptions,
   type ChannelPlugin,
   type OpenClawConfig,
+  type PluginRuntime,
 } from "openclaw/plugin-sdk";
 import { TarsServer } from "./server.js";
 import { getTarsRuntime } from "./runtime.js";
+import { createLogger, type TarsLogger } from "./logging.js";
+import { GatewayTrace } from "./tracing.js";
+import { SessionScheduler } from "./scheduler.js";
 
 const CHANNEL_ID = "tars-channel" as const;
 const meta = getChatChannelMeta(CHANNEL_ID);
@@ -15,19 +19,41 @@ const meta = getChatChannelMeta(CHANNEL_ID);
 // Global server instance
 let tarsServer: TarsServer | null = null;
 
+// Channel logger; replaced with one backed by OpenClaw's logger on start
+let channelLog: TarsLogger = createLogger();
+
+// Session the display's conversation is recorded under
+const TARS_SESSION_KEY = "agent:main:tars-channel:tars-display";
+
+type ChannelRuntime = PluginRuntime["channel"];
+type ReplyPrefixOptions = ReturnType<typeof createReplyPrefixOptions>;
+
 /**
- * Handle an inbound message from the display, dispatch through OpenClaw's
- * reply pipeline, and send the reply back to the display.
+ * Per-account values derived from config, reused across display inputs
  */
-async function handleTarsInbound(params: {
-  text: string;
-  cfg: OpenClawConfig;
-  accountId: string;
-  log?: { info?: (msg: string) => void; warn?: (msg: string) => void; error?: (msg: string) => void };
-}): Promise<void> {
-  const { text, cfg, accountId, log } = params;
-  const core = getTarsRuntime();
+interface InboundContext {
+  cfg: OpenClawConfig; // Config the values were derived from
+  route: ReturnType<ChannelRuntime["routing"]["resolveAgentRoute"]>;
+  storePath: string;
+  envelopeOptions: ReturnType<ChannelRuntime["reply"]["resolveEnvelopeFormatOptions"]>;
+  onModelSelected: ReplyPrefixOptions["onModelSelected"];
+  prefixOptions: Omit<ReplyPrefixOptions, "onModelSelected">;
+  previousTimestamp: number | undefined; // Read from the session store once, then kept here
+}
+
+// Keyed by account id; cleared when the channel (re)starts, which is how
+// OpenClaw applies changes under reload.configPrefixes
+const inboundContexts = new Map<string, InboundContext>();
 
+/**
+ * Route, store path and envelope/prefix options for an account, derived
+ * once per config instead of on every voice turn
+ */
+function resolveInboundContext(cfg: OpenClawConfig, accountId: string): InboundContext {
+  const cached = inboundContexts.get(accountId);
+  if (cached && cached.cfg === cfg) return cached;
+
+  const core = getTarsRuntime();
   const baseRoute = core.channel.routing.resolveAgentRoute({
     cfg,
     channel: CHANNEL_ID,
@@ -37,27 +63,66 @@ async function handleTarsInbound(params: {
   // Force a separate session for tars-channel so replies route through sendText
   const route = {
     ...baseRoute,
-    sessionKey: `agent:main:tars-channel:tars-display`,
+    sessionKey: TARS_SESSION_KEY,
   };
 
   const storePath = core.channel.session.resolveStorePath(cfg.session?.store, {
     agentId: route.agentId,
   });
 
-  const envelopeOptions = core.channel.reply.resolveEnvelopeFormatOptions(cfg);
-  const previousTimestamp = core.channel.session.readSessionUpdatedAt({
-    storePath,
-    sessionKey: route.sessionKey,
+  // Prefix options are shared across runs; the scheduler runs them one at a time
+  const { onModelSelected, ...prefixOptions } = createReplyPrefixOptions({
+    cfg,
+    agentId: route.agentId,
+    channel: CHANNEL_ID,
+    accountId,
   });
 
+  const context: InboundContext = {
+    cfg,
+    route,
+    storePath,
+    envelopeOptions: core.channel.reply.resolveEnvelopeFormatOptions(cfg),
+    onModelSelected,
+    prefixOptions,
+    previousTimestamp: cached?.storePath === storePath
+      ? cached.previousTimestamp
+      : core.channel.session.readSessionUpdatedAt({ storePath, sessionKey: route.sessionKey }),
+  };
+  inboundContexts.set(accountId, context);
+  return context;
+}
+
+/**
+ * Handle an inbound message from the display, dispatch through OpenClaw's
+ * reply pipeline, and send the reply back to the display.
+ */
+async function handleTarsInbound(params: {
+  text: string;
+  cfg: OpenClawConfig;
+  accountId: string;
+  log?: TarsLogger;
+  traces?: GatewayTrace[]; // Every traced utterance answered by this run
+  signal?: AbortSignal; // Aborted when the display cancels (barge-in)
+}): Promise<void> {
+  const { text, cfg, accountId, log, traces = [], signal } = params;
+  const mark = (stage: string) => {
+    for (const trace of traces) trace.mark(stage);
+  };
+  const core = getTarsRuntime();
+  const inbound = resolveInboundContext(cfg, accountId);
+  const { route, storePath } = inbound;
+
+  const receivedAt = Date.now();
   const body = core.channel.reply.formatAgentEnvelope({
     channel: "TARS",
     from: "tars-display",
-    timestamp: Date.now(),
-    previousTimestamp,
-    envelope: envelopeOptions,
+    timestamp: receivedAt,
+    previousTimestamp: inbound.previousTimestamp,
+    envelope: inbound.envelopeOptions,
     body: text,
   });
+  inbound.previousTimestamp = receivedAt;
 
   const ctxPayload = core.channel.reply.finalizeInboundContext({
     Body: body,
@@ -73,8 +138,8 @@ async function handleTarsInbound(params: {
     SenderId: "tars-display",
     Provider: CHANNEL_ID,
     Surface: CHANNEL_ID,
-    MessageSid: `tars-${Date.now()}`,
-    Timestamp: Date.now(),
+    MessageSid: `tars-${receivedAt}`,
+    Timestamp: receivedAt,
     OriginatingChannel: CHANNEL_ID,
     OriginatingTo: "tars-channel:tars",
     CommandAuthorized: true,
@@ -85,37 +150,56 @@ async function handleTarsInbound(params: {
     sessionKey: ctxPayload.SessionKey ?? route.sessionKey,
     ctx: ctxPayload,
     onRecordError: (err) => {
-      log?.error?.(`[tars-channel] Failed updating session meta: ${String(err)}`);
+      log?.error(`[tars-channel] Failed updating session meta: ${String(err)}`);
     },
   });
 
-  const { onModelSelected, ...prefixOptions } = createReplyPrefixOptions({
-    cfg,
-    agentId: route.agentId,
-    channel: CHANNEL_ID,
-    accountId,
-  });
+  const { onModelSelected, prefixOptions } = inbound;
 
-  await core.channel.reply.dispatchReplyWithBufferedBlockDispatcher({
-    ctx: ctxPayload,
-    cfg,
-    dispatcherOptions: {
-      ...prefixOptions,
-      deliver: async (payload) => {
-        const replyText = (payload as { text?: string }).text?.trim() ?? "";
-        if (replyText && tarsServer) {
-          tarsServer.sendMessage(replyText);
-          log?.info?.(`[tars-channel] Sent reply to display: ${replyText.substring(0, 50)}...`);
-        }
+  // Stream partial text to displays that support it as the model emits it;
+  // coalesced blocks still go to older displays as whole messages
+  const replyId = tarsServer?.beginReply() ?? "";
+
+  try {
+    mark("dispatch_start");
+    await core.channel.reply.dispatchReplyWithBufferedBlockDispatcher({
+      ctx: ctxPayload,
+      cfg,
+      dispatcherOptions: {
+        ...prefixOptions,
+        deliver: async (payload) => {
+          if (signal?.aborted) return;
+          const replyText = (payload as { text?: string }).text?.trim() ?? "";
+          if (replyText && tarsServer) {
+            mark("first_reply");
+            tarsServer.deliverReplyBlock(replyId, replyText);
+            log?.debug(() => `[tars-channel] Sent reply to display: ${replyText.substring(0, 50)}...`);
+          }
+        },
+        onError: (err) => {
+          log?.error(`[tars-channel] Reply delivery failed: ${String(err)}`);
+        },
       },
-      onError: (err) => {
-        log?.error?.(`[tars-channel] Reply delivery failed: ${String(err)}`);
+      replyOptions: {
+        onModelSelected,
+        abortSignal: signal,
+        onPartialReply: (payload) => {
+          if (signal?.aborted) return;
+          const partialText = (payload as { text?: string }).text ?? "";
+          if (partialText) mark("first_reply");
+          tarsServer?.updateReply(replyId, partialText);
+        },
       },
-    },
-    replyOptions: {
-      onModelSelected,
-    },
-  });
+    });
+  } finally {
+    tarsServer?.finishReply(replyId);
+    mark("reply_end");
+    sendTraces(traces);
+  }
+}
+
+function sendTraces(traces: GatewayTrace[]): void {
+  for (const trace of traces) tarsServer?.sendTrace(trace.id, trace.stages);
 }
 
 export const tarsChannelPlugin: ChannelPlugin = {
@@ -155,7 +239,9 @@ export const tarsChannelPlugin: ChannelPlugin = {
     chunker: null,
     textChunkLimit: 4000,
     sendText: async ({ to, text }) => {
-      console.log(`[tars-channel] sendText called! to=${to}, text=${text?.substring(0, 80)}..., hasServer=${!!tarsServer}, clients=${tarsServer?.getClientCount() ?? 0}`);
+      channelLog.debug(
+        () => `[tars-channel] sendText called! to=${to}, text=${text?.substring(0, 80)}..., hasServer=${!!tarsServer}, clients=${tarsServer?.getClientCount() ?? 0}`,
+      );
       if (tarsServer) {
         tarsServer.sendMessage(text);
       }
@@ -199,32 +285,47 @@ export const tarsChannelPlugin: ChannelPlugin = {
         tarsServer = null;
       }
 
-      const log = {
+      const log = createLogger({
         info: (msg: string) => ctx.log?.info?.(msg),
         warn: (msg: string) => ctx.log?.warn?.(msg),
         error: (msg: string) => ctx.log?.error?.(msg),
-      };
+      });
+      channelLog = log;
+      // Config may have changed since the last start; derive it afresh
+      inboundContexts.delete(ctx.accountId);
+
+      // One agent run at a time for the display's session; inputs that
+      // arrive meanwhile are coalesced, and the display can cancel
+      const scheduler = new SessionScheduler(
+        (job, signal) =>
+          handleTarsInbound({
+            text: job.text,
+            // Load fresh config for each run
+            cfg: ctx.cfg as OpenClawConfig,
+            accountId: ctx.accountId,
+            log,
+            traces: job.traces,
+            signal,
+          }),
+        log,
+        // Pending input dropped by a cancel never runs; report its traces now
+        (job) => sendTraces(job.traces),
+      );
 
       // Create and start Unix socket server
       tarsServer = new TarsServer({
         socketPath: "/tmp/tars-channel.sock",
         logger: log,
-        onMessage: (text) => {
-          log.info(`[tars-channel] Received input: ${text.substring(0, 80)}`);
-          // Load fresh config for each message
-          const cfg = ctx.cfg;
-          handleTarsInbound({
+        onMessage: (text, meta) => {
+          log.debug(() => `[tars-channel] Received input: ${text.substring(0, 80)}`);
+          scheduler.enqueue(TARS_SESSION_KEY, {
             text,
-            cfg: cfg as OpenClawConfig,
-            accountId: ctx.accountId,
-            log,
-          }).catch((err) => {
-            log.error(`[tars-channel] Inbound dispatch error: ${err instanceof Error ? err.message : String(err)}`);
-            if (err instanceof Error && err.stack) {
-              log.error(`[tars-channel] Stack: ${err.stack}`);
-            }
+            traces: meta.traceId ? [new GatewayTrace(meta.traceId, meta.receivedAt)] : [],
           });
         },
+        onCancel: () => {
+          scheduler.cancel(TARS_SESSION_KEY);
+        },
       });
 
       try {
@@ -240,6 +341,7 @@ export const tarsChannelPlugin: ChannelPlugin = {
       // Return cleanup function
       return async () => {
         ctx.log?.info(`[tars-channel] Stopping TARS channel`);
+        scheduler.cancelAll();
         if (tarsServer) {
           await tarsServer.stop();
           tarsServer = null;
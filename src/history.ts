@@ -0,0 +1,111 @@
+/**
+ * Bounded history of what the displays were shown
+ *
+ * Every message and every finished reply gets a sequence number and is
+ * kept in a ring bounded by entry count and text size. A display that
+ * reconnects says in its hello which sequence number it saw last (and in
+ * which server epoch); it is then sent only the entries it missed, so the
+ * transcript comes back without the agent regenerating anything.
+ *
+ * Streamed replies are recorded once, as their final text, when they end.
+ */
+import type { WireMessage } from "./protocol.js";
+
+export interface HistoryLimits {
+  maxEntries: number;
+  maxBytes: number; // Total UTF-8 size of the recorded texts
+}
+
+export const DEFAULT_HISTORY_LIMITS: HistoryLimits = {
+  maxEntries: 200,
+  maxBytes: 256 * 1024,
+};
+
+export interface HistoryStats {
+  epoch: string;
+  seq: number;
+  entries: number;
+  bytes: number;
+  replays: number;
+  replayedEntries: number;
+}
+
+interface Entry {
+  seq: number;
+  msg: WireMessage;
+  bytes: number;
+}
+
+export class ReplyHistory {
+  // Identifies this gateway run; sequence numbers restart with it
+  readonly epoch: string = Date.now().toString(36);
+  private readonly limits: HistoryLimits;
+  private entries: Entry[] = [];
+  private head = 0; // Index of the oldest retained entry
+  private bytes = 0;
+  private seq = 0;
+  private replays = 0;
+  private replayedEntries = 0;
+
+  constructor(limits: HistoryLimits = DEFAULT_HISTORY_LIMITS) {
+    this.limits = limits;
+  }
+
+  /**
+   * Record a message shown on the displays; returns it with its `seq`
+   */
+  record(msg: WireMessage): WireMessage {
+    const stamped = { ...msg, seq: ++this.seq };
+    const bytes = Buffer.byteLength(String(msg.text ?? ""), "utf8");
+    this.entries.push({ seq: this.seq, msg: { type: "message", text: msg.text, seq: this.seq }, bytes });
+    this.bytes += bytes;
+
+    while (
+      this.entries.length - this.head > this.limits.maxEntries ||
+      (this.bytes > this.limits.maxBytes && this.entries.length - this.head > 1)
+    ) {
+      this.bytes -= this.entries[this.head++].bytes;
+    }
+    if (this.head > 1024) {
+      this.entries = this.entries.slice(this.head);
+      this.head = 0;
+    }
+    return stamped;
+  }
+
+  /**
+   * Entries a display has not seen, given its hello's `last_seq`/`epoch`.
+   * A display from another epoch (the gateway restarted) or a fresh one
+   * gets everything retained.
+   */
+  missedBy(lastSeq: number, epoch: unknown): WireMessage[] {
+    const since = epoch === this.epoch ? lastSeq : 0;
+    const missed: WireMessage[] = [];
+    for (let i = this.head; i < this.entries.length; i++) {
+      if (this.entries[i].seq > since) missed.push(this.entries[i].msg);
+    }
+    if (missed.length) {
+      this.replays++;
+      this.replayedEntries += missed.length;
+    }
+    return missed;
+  }
+
+  /**
+   * Sequence number of the latest entry
+   */
+  get lastSeq(): number {
+    return this.seq;
+  }
+
+  getStats(): HistoryStats {
+    return {
+      epoch: this.epoch,
+      seq: this.seq,
+      entries: this.entries.length - this.head,
+      bytes: this.bytes,
+      replays: this.replays,
+      replayedEntries: this.replayedEntries,
+    };
+  }
+}
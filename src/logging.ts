@@ -0,0 +1,119 @@
+/**
+ * Leveled, queued and rate-limited logging for the TARS channel
+ *
+ * Records below the configured level cost one comparison: messages may be
+ * passed as closures so their strings are never built. Enabled records are
+ * queued and handed to the sink (OpenClaw's logger or the console) on the
+ * next event loop turn, off the socket data path. Per-site rate limits keep
+ * a misbehaving display from flooding the journal.
+ *
+ *   TARS_LOG_LEVEL=debug   # per-message logging
+ */
+
+export type LogLevel = "debug" | "info" | "warn" | "error";
+
+export interface LogSink {
+  debug?: (msg: string) => void;
+  info?: (msg: string) => void;
+  warn?: (msg: string) => void;
+  error?: (msg: string) => void;
+}
+
+export type LogMessage = string | (() => string);
+
+const LEVELS: Record<LogLevel, number> = { debug: 10, info: 20, warn: 30, error: 40 };
+
+const RATE_LIMIT_PER_SITE = 20; // Records per site per window
+const RATE_LIMIT_WINDOW_MS = 10_000;
+
+function resolveLevel(value: string | undefined): LogLevel {
+  const level = value?.toLowerCase();
+  return level && level in LEVELS ? (level as LogLevel) : "info";
+}
+
+interface Site {
+  windowStart: number;
+  count: number;
+  suppressed: number;
+}
+
+export class TarsLogger {
+  readonly level: LogLevel;
+  private readonly sink: LogSink;
+  private readonly threshold: number;
+  private queue: Array<[LogLevel, string]> = [];
+  private flushScheduled = false;
+  private sites: Map<string, Site> = new Map();
+
+  constructor(sink: LogSink, level: LogLevel = resolveLevel(process.env.TARS_LOG_LEVEL)) {
+    this.sink = sink;
+    this.level = level;
+    this.threshold = LEVELS[level];
+  }
+
+  enabled(level: LogLevel): boolean {
+    return LEVELS[level] >= this.threshold;
+  }
+
+  debug(msg: LogMessage, site?: string): void {
+    this.log("debug", msg, site);
+  }
+
+  info(msg: LogMessage, site?: string): void {
+    this.log("info", msg, site);
+  }
+
+  warn(msg: LogMessage, site?: string): void {
+    this.log("warn", msg, site);
+  }
+
+  error(msg: LogMessage, site?: string): void {
+    this.log("error", msg, site);
+  }
+
+  /**
+   * Write everything queued so far (e.g. before shutdown)
+   */
+  flush(): void {
+    this.flushScheduled = false;
+    const queue = this.queue;
+    this.queue = [];
+    for (const [level, text] of queue) {
+      const write = this.sink[level] ?? (level === "debug" ? this.sink.info : undefined);
+      write?.(text);
+    }
+  }
+
+  /**
+   * Log at `level`; when `site` is given, that site is rate limited
+   */
+  private log(level: LogLevel, msg: LogMessage, site?: string): void {
+    if (LEVELS[level] < this.threshold) return;
+
+    let suffix = "";
+    if (site) {
+      const now = Date.now();
+      const state = this.sites.get(site);
+      if (!state || now - state.windowStart >= RATE_LIMIT_WINDOW_MS) {
+        if (state?.suppressed) suffix = ` (+${state.suppressed} similar suppressed)`;
+        this.sites.set(site, { windowStart: now, count: 1, suppressed: 0 });
+      } else if (++state.count > RATE_LIMIT_PER_SITE) {
+        state.suppressed++;
+        return;
+      }
+    }
+
+    this.queue.push([level, (typeof msg === "function" ? msg() : msg) + suffix]);
+    if (!this.flushScheduled) {
+      this.flushScheduled = true;
+      setImmediate(() => this.flush());
+    }
+  }
+}
+
+/**
+ * Wrap a sink (or reuse a logger that is already a TarsLogger)
+ */
+export function createLogger(sink: LogSink | TarsLogger = console): TarsLogger {
+  return sink instanceof TarsLogger ? sink : new TarsLogger(sink);
+}
@@ -0,0 +1,134 @@
+/**
+ * Round-trip tests for the msgpack codec against the Python `msgpack`
+ * package the display uses. Needs python3 with msgpack installed.
+ *
+ *   node --test src/msgpack.test.ts
+ */
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { execFileSync } from "node:child_process";
+import { decode, encode } from "./msgpack.ts";
+
+// Every type the codec handles, packed the way the display packs frames.
+// Bytes travel as {"$bin": hex} in the JSON description of each value.
+const PACK_CASES = String.raw`
+import json, sys, msgpack
+
+cases = {
+    "nil": None,
+    "true": True,
+    "false": False,
+    "positive_fixint": 7,
+    "negative_fixint": -5,
+    "uint8": 200,
+    "uint16": 60000,
+    "uint32": 4000000000,
+    "uint64": 2 ** 40,
+    "int8": -100,
+    "int16": -1000,
+    "int32": -100000,
+    "int64": -(2 ** 40),
+    "float64": 1.5,
+    "fixstr": "hi",
+    "str8": "a" * 40,
+    "str16": "é" * 200,
+    "str32": "x" * 70000,
+    "bin8": b"\x00\x01\xff",
+    "bin16": bytes(range(256)) * 2,
+    "bin32": b"\x07" * 70000,
+    "fixarray": [1, -2, "three", None],
+    "array16": list(range(20)),
+    "fixmap": {"type": "status", "text": "ok"},
+    "map16": {f"k{i}": i for i in range(20)},
+    "nested": {"type": "reply_delta", "id": "r1",
+               "meta": {"seq": 3, "ok": True, "none": None, "list": [1, -2, [b"\x01"]]}},
+}
+
+def describe(value):
+    if isinstance(value, bytes):
+        return {"$bin": value.hex()}
+    if isinstance(value, list):
+        return [describe(v) for v in value]
+    if isinstance(value, dict):
+        return {k: describe(v) for k, v in value.items()}
+    return value
+
+out = {name: {"packed": msgpack.packb(value, use_bin_type=True).hex(), "value": describe(value)}
+       for name, value in cases.items()}
+out["float32"] = {"packed": msgpack.packb(0.25, use_single_float=True).hex(), "value": 0.25}
+json.dump(out, sys.stdout)
+`;
+
+// Unpacks each hex payload on stdin and reports those that differ
+const UNPACK_CHECK = String.raw`
+import json, sys, msgpack
+
+def describe(value):
+    if isinstance(value, bytes):
+        return {"$bin": value.hex()}
+    if isinstance(value, list):
+        return [describe(v) for v in value]
+    if isinstance(value, dict):
+        return {k: describe(v) for k, v in value.items()}
+    return value
+
+cases = json.load(sys.stdin)
+bad = [name for name, case in cases.items()
+       if describe(msgpack.unpackb(bytes.fromhex(case["packed"]), raw=False)) != case["value"]]
+json.dump(bad, sys.stdout)
+`;
+
+type Case = { packed: string; value: unknown };
+
+function python(script: string, input?: string): unknown {
+  return JSON.parse(execFileSync("python3", ["-c", script], { input, maxBuffer: 64 * 1024 * 1024 }).toString());
+}
+
+function revive(value: unknown): unknown {
+  if (Array.isArray(value)) return value.map(revive);
+  if (value && typeof value === "object") {
+    const hex = (value as { $bin?: string }).$bin;
+    if (typeof hex === "string") return Buffer.from(hex, "hex");
+    return Object.fromEntries(Object.entries(value).map(([k, v]) => [k, revive(v)]));
+  }
+  return value;
+}
+
+const cases = python(PACK_CASES) as Record<string, Case>;
+
+test("decodes Python msgpack output", () => {
+  for (const [name, { packed, value }] of Object.entries(cases)) {
+    assert.deepEqual(decode(Buffer.from(packed, "hex")), revive(value), name);
+  }
+});
+
+test("round-trips its own encoding", () => {
+  for (const [name, { value }] of Object.entries(cases)) {
+    const expected = revive(value);
+    assert.deepEqual(decode(encode(expected)), expected, name);
+  }
+});
+
+test("encodes what Python msgpack decodes", () => {
+  const encoded: Record<string, Case> = {};
+  for (const [name, { value }] of Object.entries(cases)) {
+    encoded[name] = { packed: encode(revive(value)).toString("hex"), value };
+  }
+  assert.deepEqual(python(UNPACK_CHECK, JSON.stringify(encoded)), []);
+});
+
+test("keeps a __proto__ key as a plain field", () => {
+  // {"__proto__": {"polluted": true}, "type": "input"}
+  const packed = Buffer.from("82a95f5f70726f746f5f5f81a8706f6c6c75746564c3a474797065a5696e707574", "hex");
+  const msg = decode(packed) as Record<string, unknown>;
+  assert.equal(Object.getPrototypeOf(msg), Object.prototype);
+  assert.equal((msg as { polluted?: unknown }).polluted, undefined);
+  assert.deepEqual(Object.keys(msg), ["__proto__", "type"]);
+  assert.deepEqual(msg["__proto__"], { polluted: true });
+});
+
+test("rejects truncated and trailing data", () => {
+  const packed = Buffer.from(cases.str8.packed, "hex");
+  assert.throws(() => decode(packed.subarray(0, packed.length - 1)), /Unexpected end/);
+  assert.throws(() => decode(Buffer.concat([packed, Buffer.from([0xc0])])), /Trailing bytes/);
+});
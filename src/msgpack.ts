@@ -0,0 +1,240 @@
+/**
+ * Minimal MessagePack codec for the TARS display protocol
+ * Covers nil, booleans, numbers, strings, binary, arrays and maps — enough
+ * for display frames without pulling in a runtime dependency.
+ */
+
+export class MsgpackError extends Error {}
+
+class Writer {
+  private buf: Buffer = Buffer.allocUnsafe(256);
+  private pos = 0;
+
+  private ensure(n: number): void {
+    if (this.pos + n <= this.buf.length) return;
+    let size = this.buf.length * 2;
+    while (size < this.pos + n) size *= 2;
+    const next = Buffer.allocUnsafe(size);
+    this.buf.copy(next, 0, 0, this.pos);
+    this.buf = next;
+  }
+
+  u8(v: number): void {
+    this.ensure(1);
+    this.buf[this.pos++] = v;
+  }
+
+  u16(v: number): void {
+    this.ensure(2);
+    this.buf.writeUInt16BE(v, this.pos);
+    this.pos += 2;
+  }
+
+  u32(v: number): void {
+    this.ensure(4);
+    this.buf.writeUInt32BE(v, this.pos);
+    this.pos += 4;
+  }
+
+  bytes(b: Uint8Array): void {
+    this.ensure(b.length);
+    this.buf.set(b, this.pos);
+    this.pos += b.length;
+  }
+
+  number(v: number): void {
+    if (Number.isInteger(v) && Number.isSafeInteger(v)) {
+      if (v >= 0) {
+        if (v < 0x80) return this.u8(v);
+        if (v <= 0xff) { this.u8(0xcc); return this.u8(v); }
+        if (v <= 0xffff) { this.u8(0xcd); return this.u16(v); }
+        if (v <= 0xffffffff) { this.u8(0xce); return this.u32(v); }
+        this.u8(0xcf);
+        this.ensure(8);
+        this.buf.writeBigUInt64BE(BigInt(v), this.pos);
+        this.pos += 8;
+        return;
+      }
+      if (v >= -32) return this.u8(v & 0xff);
+      if (v >= -0x80) { this.u8(0xd0); this.ensure(1); this.buf.writeInt8(v, this.pos); this.pos += 1; return; }
+      if (v >= -0x8000) { this.u8(0xd1); this.ensure(2); this.buf.writeInt16BE(v, this.pos); this.pos += 2; return; }
+      if (v >= -0x80000000) { this.u8(0xd2); this.ensure(4); this.buf.writeInt32BE(v, this.pos); this.pos += 4; return; }
+      this.u8(0xd3);
+      this.ensure(8);
+      this.buf.writeBigInt64BE(BigInt(v), this.pos);
+      this.pos += 8;
+      return;
+    }
+    this.u8(0xcb);
+    this.ensure(8);
+    this.buf.writeDoubleBE(v, this.pos);
+    this.pos += 8;
+  }
+
+  string(s: string): void {
+    const len = Buffer.byteLength(s, "utf8");
+    if (len < 32) this.u8(0xa0 | len);
+    else if (len <= 0xff) { this.u8(0xd9); this.u8(len); }
+    else if (len <= 0xffff) { this.u8(0xda); this.u16(len); }
+    else { this.u8(0xdb); this.u32(len); }
+    this.ensure(len);
+    this.buf.write(s, this.pos, len, "utf8");
+    this.pos += len;
+  }
+
+  value(v: unknown): void {
+    if (v === null || v === undefined) return this.u8(0xc0);
+    if (v === false) return this.u8(0xc2);
+    if (v === true) return this.u8(0xc3);
+    if (typeof v === "number") return this.number(v);
+    if (typeof v === "string") return this.string(v);
+    if (v instanceof Uint8Array) {
+      const len = v.length;
+      if (len <= 0xff) { this.u8(0xc4); this.u8(len); }
+      else if (len <= 0xffff) { this.u8(0xc5); this.u16(len); }
+      else { this.u8(0xc6); this.u32(len); }
+      return this.bytes(v);
+    }
+    if (Array.isArray(v)) {
+      const len = v.length;
+      if (len < 16) this.u8(0x90 | len);
+      else if (len <= 0xffff) { this.u8(0xdc); this.u16(len); }
+      else { this.u8(0xdd); this.u32(len); }
+      for (const item of v) this.value(item);
+      return;
+    }
+    if (typeof v === "object") {
+      const entries = Object.entries(v as Record<string, unknown>).filter(([, val]) => val !== undefined);
+      const len = entries.length;
+      if (len < 16) this.u8(0x80 | len);
+      else if (len <= 0xffff) { this.u8(0xde); this.u16(len); }
+      else { this.u8(0xdf); this.u32(len); }
+      for (const [key, val] of entries) {
+        this.string(key);
+        this.value(val);
+      }
+      return;
+    }
+    throw new MsgpackError(`Cannot encode ${typeof v}`);
+  }
+
+  result(): Buffer {
+    return this.buf.subarray(0, this.pos);
+  }
+}
+
+class Reader {
+  private pos = 0;
+  private readonly buf: Buffer;
+
+  constructor(buf: Buffer) {
+    this.buf = buf;
+  }
+
+  private need(n: number): void {
+    if (this.pos + n > this.buf.length) {
+      throw new MsgpackError("Unexpected end of msgpack data");
+    }
+  }
+
+  done(): boolean {
+    return this.pos === this.buf.length;
+  }
+
+  private str(len: number): string {
+    this.need(len);
+    const s = this.buf.toString("utf8", this.pos, this.pos + len);
+    this.pos += len;
+    return s;
+  }
+
+  private bin(len: number): Buffer {
+    this.need(len);
+    const b = Buffer.from(this.buf.subarray(this.pos, this.pos + len));
+    this.pos += len;
+    return b;
+  }
+
+  private array(len: number): unknown[] {
+    const out: unknown[] = new Array(len);
+    for (let i = 0; i < len; i++) out[i] = this.value();
+    return out;
+  }
+
+  private map(len: number): Record<string, unknown> {
+    const out: Record<string, unknown> = {};
+    for (let i = 0; i < len; i++) {
+      const key = String(this.value());
+      const value = this.value();
+      if (key === "__proto__") {
+        // Plain assignment would replace the prototype, not add a field
+        Object.defineProperty(out, key, { value, enumerable: true, writable: true, configurable: true });
+      } else {
+        out[key] = value;
+      }
+    }
+    return out;
+  }
+
+  private read(n: number, fn: (offset: number) => number | bigint): number {
+    this.need(n);
+    const v = fn(this.pos);
+    this.pos += n;
+    return Number(v);
+  }
+
+  value(): unknown {
+    this.need(1);
+    const b = this.buf[this.pos++];
+    const buf = this.buf;
+
+    if (b < 0x80) return b;
+    if (b >= 0xe0) return b - 0x100;
+    if ((b & 0xf0) === 0x80) return this.map(b & 0x0f);
+    if ((b & 0xf0) === 0x90) return this.array(b & 0x0f);
+    if ((b & 0xe0) === 0xa0) return this.str(b & 0x1f);
+
+    switch (b) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: return this.bin(this.read(1, (o) => buf.readUInt8(o)));
+      case 0xc5: return this.bin(this.read(2, (o) => buf.readUInt16BE(o)));
+      case 0xc6: return this.bin(this.read(4, (o) => buf.readUInt32BE(o)));
+      case 0xca: return this.read(4, (o) => buf.readFloatBE(o));
+      case 0xcb: return this.read(8, (o) => buf.readDoubleBE(o));
+      case 0xcc: return this.read(1, (o) => buf.readUInt8(o));
+      case 0xcd: return this.read(2, (o) => buf.readUInt16BE(o));
+      case 0xce: return this.read(4, (o) => buf.readUInt32BE(o));
+      case 0xcf: return this.read(8, (o) => buf.readBigUInt64BE(o));
+      case 0xd0: return this.read(1, (o) => buf.readInt8(o));
+      case 0xd1: return this.read(2, (o) => buf.readInt16BE(o));
+      case 0xd2: return this.read(4, (o) => buf.readInt32BE(o));
+      case 0xd3: return this.read(8, (o) => buf.readBigInt64BE(o));
+      case 0xd9: return this.str(this.read(1, (o) => buf.readUInt8(o)));
+      case 0xda: return this.str(this.read(2, (o) => buf.readUInt16BE(o)));
+      case 0xdb: return this.str(this.read(4, (o) => buf.readUInt32BE(o)));
+      case 0xdc: return this.array(this.read(2, (o) => buf.readUInt16BE(o)));
+      case 0xdd: return this.array(this.read(4, (o) => buf.readUInt32BE(o)));
+      case 0xde: return this.map(this.read(2, (o) => buf.readUInt16BE(o)));
+      case 0xdf: return this.map(this.read(4, (o) => buf.readUInt32BE(o)));
+      default:
+        throw new MsgpackError(`Unsupported msgpack type 0x${b.toString(16)}`);
+    }
+  }
+}
+
+export function encode(value: unknown): Buffer {
+  const writer = new Writer();
+  writer.value(value);
+  return writer.result();
+}
+
+export function decode(buf: Buffer): unknown {
+  const reader = new Reader(buf);
+  const value = reader.value();
+  if (!reader.done()) {
+    throw new MsgpackError("Trailing bytes after msgpack value");
+  }
+  return value;
+}
@@ -0,0 +1,223 @@
+/**
+ * Bounded per-display outbound queue
+ *
+ * Frames are queued in user space and flushed at most once per event loop
+ * turn inside cork()/uncork(), so a burst of frames becomes one write.
+ * While the socket reports backpressure the queue waits for `drain`
+ * instead of letting Node buffer without limit. When a display falls
+ * behind the high-water mark the overflow policy kicks in:
+ *
+ *   1. drop queued status frames
+ *   2. coalesce queued reply deltas (or drop them when the reply's final
+ *      text is already queued)
+ *   3. disconnect the display once the hard limit is exceeded
+ */
+import type * as net from "node:net";
+import type { WireMessage } from "./protocol.js";
+
+export type FrameKind = "message" | "delta" | "status";
+
+export interface OutboundLimits {
+  highWaterBytes: number; // Start shedding above this many queued bytes
+  maxQueueBytes: number; // Disconnect above this many after shedding
+}
+
+export const DEFAULT_OUTBOUND_LIMITS: OutboundLimits = {
+  highWaterBytes: 256 * 1024,
+  maxQueueBytes: 1024 * 1024,
+};
+
+export interface OutboundStats {
+  queuedFrames: number;
+  queuedBytes: number;
+  peakQueuedBytes: number;
+  socketBufferedBytes: number;
+  sentFrames: number;
+  droppedFrames: number;
+  coalescedFrames: number;
+  drainWaits: number;
+}
+
+interface Entry {
+  data: Buffer;
+  kind: FrameKind;
+  msg: WireMessage; // Kept so deltas can be merged and re-encoded
+}
+
+export class OutboundQueue {
+  private readonly socket: net.Socket;
+  private readonly limits: OutboundLimits;
+  private readonly encode: (msg: WireMessage) => Buffer;
+  private readonly onOverflow: (reason: string) => void;
+  private entries: Entry[] = [];
+  private head = 0; // Index of the first unsent entry
+  private bytes = 0;
+  private flushScheduled = false;
+  private relievedThisTick = false; // The overflow policy is O(n); run it once per tick
+  private waitingForDrain = false;
+  private closed = false;
+  private stats = {
+    peakQueuedBytes: 0,
+    sentFrames: 0,
+    droppedFrames: 0,
+    coalescedFrames: 0,
+    drainWaits: 0,
+  };
+
+  /**
+   * `encode` turns a message into bytes in the connection's current wire
+   * format (used when merged deltas are re-encoded)
+   */
+  constructor(
+    socket: net.Socket,
+    limits: OutboundLimits,
+    encode: (msg: WireMessage) => Buffer,
+    onOverflow: (reason: string) => void,
+  ) {
+    this.socket = socket;
+    this.limits = limits;
+    this.encode = encode;
+    this.onOverflow = onOverflow;
+    socket.on("drain", () => {
+      this.waitingForDrain = false;
+      this.flush();
+    });
+    socket.on("close", () => {
+      this.closed = true;
+      this.entries = [];
+      this.head = 0;
+      this.bytes = 0;
+    });
+  }
+
+  /**
+   * Queue an encoded frame; returns false if the display was dropped
+   */
+  push(data: Buffer, kind: FrameKind, msg: WireMessage): boolean {
+    if (this.closed) return false;
+    this.entries.push({ data, kind, msg });
+    this.bytes += data.length;
+    this.stats.peakQueuedBytes = Math.max(this.stats.peakQueuedBytes, this.bytes);
+
+    // Later pushes in the same tick are checked by the scheduled flush
+    if (this.bytes > this.limits.highWaterBytes && !this.relievedThisTick && !this.relieve()) {
+      return false;
+    }
+    if (!this.flushScheduled) {
+      this.flushScheduled = true;
+      setImmediate(() => this.flush());
+    }
+    return true;
+  }
+
+  getStats(): OutboundStats {
+    return {
+      queuedFrames: this.entries.length - this.head,
+      queuedBytes: this.bytes,
+      socketBufferedBytes: this.socket.writableLength,
+      ...this.stats,
+    };
+  }
+
+  private flush(): void {
+    this.flushScheduled = false;
+    this.relievedThisTick = false;
+    if (this.closed) return;
+    if (this.bytes > this.limits.highWaterBytes && !this.relieve()) return;
+    if (this.waitingForDrain || this.head === this.entries.length) return;
+
+    this.socket.cork();
+    while (this.head < this.entries.length) {
+      const entry = this.entries[this.head++];
+      this.bytes -= entry.data.length;
+      this.stats.sentFrames++;
+      if (!this.socket.write(entry.data)) {
+        // Kernel buffer full: keep the rest here until the socket drains
+        this.waitingForDrain = true;
+        this.stats.drainWaits++;
+        break;
+      }
+    }
+    this.socket.uncork();
+
+    if (this.head === this.entries.length) {
+      this.entries = [];
+      this.head = 0;
+    } else if (this.head > 1024) {
+      this.entries = this.entries.slice(this.head);
+      this.head = 0;
+    }
+  }
+
+  /**
+   * Apply the overflow policy; returns false if the display was dropped
+   */
+  private relieve(): boolean {
+    this.relievedThisTick = true;
+    const pending = this.entries.slice(this.head);
+    let kept: Entry[] = pending.filter((e) => e.kind !== "status");
+    this.stats.droppedFrames += pending.length - kept.length;
+
+    let bytes = this.bytesOf(kept);
+    if (bytes > this.limits.highWaterBytes) {
+      kept = this.coalesce(kept);
+      bytes = this.bytesOf(kept);
+    }
+
+    this.entries = kept;
+    this.head = 0;
+    this.bytes = bytes;
+
+    if (this.bytes > this.limits.maxQueueBytes) {
+      this.onOverflow(`${this.bytes} bytes queued`);
+      this.closed = true;
+      this.entries = [];
+      this.bytes = 0;
+      this.socket.destroy();
+      return false;
+    }
+    return true;
+  }
+
+  private coalesce(entries: Entry[]): Entry[] {
+    // Replies whose final text is queued do not need their deltas at all
+    const ended = new Set<unknown>();
+    for (const e of entries) {
+      if (e.msg.type === "reply_end") ended.add(e.msg.id);
+    }
+
+    const out: Entry[] = [];
+    const firstDelta = new Map<unknown, Entry>();
+    for (const e of entries) {
+      if (e.kind !== "delta") {
+        out.push(e);
+        continue;
+      }
+      const id = e.msg.id;
+      if (ended.has(id)) {
+        this.stats.coalescedFrames++;
+        continue;
+      }
+      const first = firstDelta.get(id);
+      if (!first) {
+        firstDelta.set(id, e);
+        out.push(e);
+        continue;
+      }
+      first.msg = { ...first.msg, text: String(first.msg.text ?? "") + String(e.msg.text ?? "") };
+      this.stats.coalescedFrames++;
+    }
+
+    // Re-encode merged deltas in the connection's current wire format
+    for (const e of firstDelta.values()) {
+      e.data = this.encode(e.msg);
+    }
+    return out;
+  }
+
+  private bytesOf(entries: Entry[]): number {
+    let total = 0;
+    for (const e of entries) total += e.data.length;
+    return total;
+  }
+}
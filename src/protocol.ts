@@ -0,0 +1,180 @@
+/**
+ * TARS display wire protocol
+ *
+ * Version 1 is newline-delimited JSON. A display that supports version 2
+ * opens with a JSON `hello` line; the server answers with its own `hello`
+ * line and from then on both sides may send length-prefixed frames:
+ *
+ *   [u32 BE length of type + payload][u8 type][payload]
+ *
+ * MESSAGE frames carry an object in the negotiated encoding (msgpack or
+ * JSON), BINARY frames carry raw bytes. Frames are capped at
+ * MAX_FRAME_BYTES so the high byte of the length is always zero, which
+ * lets the decoder tell a frame from a JSON line (which starts with `{`)
+ * and accept both on the same connection.
+ */
+import * as msgpack from "./msgpack.js";
+
+export const PROTOCOL_VERSION = 2;
+export const MAX_FRAME_BYTES = 1024 * 1024;
+export const MAX_LINE_BYTES = 1024 * 1024;
+
+export const FRAME_MESSAGE = 0x01;
+export const FRAME_BINARY = 0x02;
+
+export type Encoding = "msgpack" | "json";
+export const SUPPORTED_ENCODINGS: Encoding[] = ["msgpack", "json"];
+
+export type WireMessage = Record<string, unknown> & { type?: string };
+
+export type DecodedItem =
+  | { kind: "message"; message: WireMessage }
+  | { kind: "binary"; data: Buffer }
+  | { kind: "invalid"; error: string; preview: string };
+
+export class ProtocolError extends Error {}
+
+/**
+ * Incremental decoder for a mixed JSON-line / frame byte stream.
+ * Bytes are appended to one growable buffer and every byte is scanned at
+ * most once, so decoding stays O(n) however the stream is chunked.
+ */
+export class FrameDecoder {
+  encoding: Encoding = "json";
+  private buf: Buffer = Buffer.allocUnsafe(4096);
+  private start = 0;
+  private end = 0;
+  private scanned = 0; // Bytes after `start` already searched for a newline
+
+  push(chunk: Buffer): DecodedItem[] {
+    this.append(chunk);
+    const items: DecodedItem[] = [];
+
+    while (this.start < this.end) {
+      if (this.buf[this.start] === 0x00) {
+        // Length-prefixed frame
+        if (this.end - this.start < 5) break;
+        const length = this.buf.readUInt32BE(this.start);
+        if (length < 1 || length > MAX_FRAME_BYTES) {
+          throw new ProtocolError(`Invalid frame length ${length}`);
+        }
+        if (this.end - this.start < 4 + length) break;
+        const type = this.buf[this.start + 4];
+        const payload = this.buf.subarray(this.start + 5, this.start + 4 + length);
+        this.start += 4 + length;
+        this.scanned = 0;
+        items.push(this.decodeFrame(type, payload));
+        continue;
+      }
+
+      // Newline-delimited JSON
+      const from = this.start + this.scanned;
+      const idx = this.buf.indexOf(0x0a, from);
+      if (idx === -1 || idx >= this.end) {
+        this.scanned = this.end - this.start;
+        if (this.scanned > MAX_LINE_BYTES) {
+          throw new ProtocolError(`Line exceeds ${MAX_LINE_BYTES} bytes`);
+        }
+        break;
+      }
+      const line = this.buf.toString("utf8", this.start, idx);
+      this.start = idx + 1;
+      this.scanned = 0;
+      if (!line.trim()) continue;
+      items.push(this.decodeJson(line));
+    }
+
+    if (this.start === this.end) {
+      this.start = this.end = 0;
+    }
+    return items;
+  }
+
+  private append(chunk: Buffer): void {
+    if (this.end + chunk.length > this.buf.length) {
+      const pending = this.end - this.start;
+      if (pending + chunk.length <= this.buf.length / 2) {
+        // Plenty of room once consumed bytes are dropped
+        this.buf.copyWithin(0, this.start, this.end);
+      } else {
+        let size = this.buf.length * 2;
+        while (size < pending + chunk.length) size *= 2;
+        const next = Buffer.allocUnsafe(size);
+        this.buf.copy(next, 0, this.start, this.end);
+        this.buf = next;
+      }
+      this.start = 0;
+      this.end = pending;
+    }
+    chunk.copy(this.buf, this.end);
+    this.end += chunk.length;
+  }
+
+  private decodeJson(line: string): DecodedItem {
+    try {
+      return { kind: "message", message: JSON.parse(line) as WireMessage };
+    } catch (err) {
+      return { kind: "invalid", error: err instanceof Error ? err.message : String(err), preview: line.substring(0, 100) };
+    }
+  }
+
+  private decodeFrame(type: number, payload: Buffer): DecodedItem {
+    if (type === FRAME_BINARY) {
+      return { kind: "binary", data: Buffer.from(payload) };
+    }
+    if (type !== FRAME_MESSAGE) {
+      return { kind: "invalid", error: `Unknown frame type ${type}`, preview: "" };
+    }
+    try {
+      const message = this.encoding === "msgpack"
+        ? msgpack.decode(payload)
+        : JSON.parse(payload.toString("utf8"));
+      return { kind: "message", message: message as WireMessage };
+    } catch (err) {
+      return { kind: "invalid", error: err instanceof Error ? err.message : String(err), preview: "" };
+    }
+  }
+}
+
+function frame(type: number, payload: Buffer): Buffer {
+  if (payload.length + 1 > MAX_FRAME_BYTES) {
+    throw new ProtocolError(`Frame of ${payload.length} bytes exceeds limit`);
+  }
+  const out = Buffer.allocUnsafe(5 + payload.length);
+  out.writeUInt32BE(payload.length + 1, 0);
+  out[4] = type;
+  payload.copy(out, 5);
+  return out;
+}
+
+/**
+ * Encode a message for a peer: a JSON line until the connection has been
+ * upgraded, a MESSAGE frame in the negotiated encoding afterwards.
+ */
+export function encodeMessage(message: WireMessage, framed: boolean, encoding: Encoding): Buffer {
+  if (!framed) {
+    return Buffer.from(JSON.stringify(message) + "\n", "utf8");
+  }
+  const payload = encoding === "msgpack"
+    ? msgpack.encode(message)
+    : Buffer.from(JSON.stringify(message), "utf8");
+  return frame(FRAME_MESSAGE, payload);
+}
+
+export function encodeBinary(data: Buffer): Buffer {
+  return frame(FRAME_BINARY, data);
+}
+
+/**
+ * Pick the protocol version and encoding for a client `hello`.
+ */
+export function negotiate(hello: WireMessage): { protocol: number; encoding: Encoding } {
+  const versions = Array.isArray(hello.protocol) ? hello.protocol : [hello.protocol];
+  const protocol = Math.max(
+    1,
+    ...versions.filter((v): v is number => typeof v === "number" && v <= PROTOCOL_VERSION),
+  );
+  const offered = Array.isArray(hello.encodings) ? hello.encodings : [];
+  const encoding = SUPPORTED_ENCODINGS.find((e) => offered.includes(e)) ?? "json";
+  return { protocol, encoding };
+}
@@ -0,0 +1,135 @@
+/**
+ * Per-session inbound scheduler
+ *
+ * Runs at most one agent dispatch per session at a time. Inputs that
+ * arrive while a run is in flight wait in a single pending slot, and
+ * further inputs are coalesced into it, so a burst of voice inputs becomes
+ * one follow-up run instead of several competing replies. A cancel
+ * ("barge-in") from the display aborts the in-flight run through its
+ * AbortSignal and drops anything pending.
+ *
+ * A job carries the trace of every input merged into it, so each utterance
+ * still gets its gateway stages reported; merged ones are marked
+ * `coalesced`, and pending ones dropped by a cancel are handed to
+ * `onDropped` marked `cancelled`.
+ */
+import type { TarsLogger } from "./logging.js";
+import type { GatewayTrace } from "./tracing.js";
+
+export interface InboundJob {
+  text: string;
+  traces: GatewayTrace[]; // One per traced input merged into the job
+}
+
+export type InboundRunner = (job: InboundJob, signal: AbortSignal) => Promise<void>;
+
+export interface SchedulerStats {
+  runs: number;
+  coalesced: number; // Inputs merged into an already pending job
+  cancelled: number; // In-flight runs aborted
+  dropped: number; // Pending jobs discarded by a cancel
+}
+
+interface Session {
+  active: AbortController | null;
+  pending: InboundJob | null;
+}
+
+export class SessionScheduler {
+  private readonly run: InboundRunner;
+  private readonly logger: TarsLogger;
+  private readonly onDropped?: (job: InboundJob) => void;
+  private sessions: Map<string, Session> = new Map();
+  private stats: SchedulerStats = { runs: 0, coalesced: 0, cancelled: 0, dropped: 0 };
+
+  constructor(run: InboundRunner, logger: TarsLogger, onDropped?: (job: InboundJob) => void) {
+    this.run = run;
+    this.logger = logger;
+    this.onDropped = onDropped;
+  }
+
+  /**
+   * Queue an input for a session; it runs now or after the current run
+   */
+  enqueue(sessionKey: string, job: InboundJob): void {
+    const session = this.session(sessionKey);
+    if (!session.active) {
+      this.start(sessionKey, session, job);
+      return;
+    }
+    if (session.pending) {
+      for (const trace of session.pending.traces) trace.mark("coalesced");
+      session.pending = {
+        text: `${session.pending.text}\n${job.text}`,
+        traces: [...session.pending.traces, ...job.traces],
+      };
+      this.stats.coalesced++;
+      this.logger.debug(() => `[tars-channel] Coalesced input into pending run for ${sessionKey}`);
+    } else {
+      session.pending = job;
+    }
+  }
+
+  /**
+   * Abort the in-flight run and drop pending input; false if idle
+   */
+  cancel(sessionKey: string): boolean {
+    const session = this.sessions.get(sessionKey);
+    if (!session?.active) return false;
+    const dropped = session.pending;
+    if (dropped) {
+      session.pending = null;
+      this.stats.dropped++;
+      for (const trace of dropped.traces) trace.mark("cancelled");
+      this.onDropped?.(dropped);
+    }
+    session.active.abort();
+    this.stats.cancelled++;
+    this.logger.info(`[tars-channel] Cancelled reply for ${sessionKey}`);
+    return true;
+  }
+
+  /**
+   * Cancel every session (channel shutdown)
+   */
+  cancelAll(): void {
+    for (const key of this.sessions.keys()) this.cancel(key);
+  }
+
+  getStats(): SchedulerStats {
+    return { ...this.stats };
+  }
+
+  private session(sessionKey: string): Session {
+    let session = this.sessions.get(sessionKey);
+    if (!session) {
+      session = { active: null, pending: null };
+      this.sessions.set(sessionKey, session);
+    }
+    return session;
+  }
+
+  private start(sessionKey: string, session: Session, job: InboundJob): void {
+    const controller = new AbortController();
+    session.active = controller;
+    this.stats.runs++;
+
+    this.run(job, controller.signal)
+      .catch((err) => {
+        if (controller.signal.aborted) {
+          this.logger.debug(() => `[tars-channel] Aborted run ended: ${String(err)}`);
+          return;
+        }
+        this.logger.error(`[tars-channel] Inbound dispatch error: ${err instanceof Error ? err.message : String(err)}`);
+        if (err instanceof Error && err.stack) {
+          this.logger.error(`[tars-channel] Stack: ${err.stack}`);
+        }
+      })
+      .finally(() => {
+        session.active = null;
+        const next = session.pending;
+        session.pending = null;
+        if (next) this.start(sessionKey, session, next);
+      });
+  }
+}
@@ -5,32 +5,90 @@
 import * as net from "node:net";
 import * as fs from "node:fs";
 import * as path from "node:path";
+import {
+  FrameDecoder,
+  ProtocolError,
+  PROTOCOL_VERSION,
+  MAX_FRAME_BYTES,
+  encodeMessage,
+  negotiate,
+  type Encoding,
+  type WireMessage,
+} from "./protocol.js";
+import {
+  OutboundQueue,
+  DEFAULT_OUTBOUND_LIMITS,
+  type FrameKind,
+  type OutboundLimits,
+  type OutboundStats,
+} from "./outbound.js";
+import {
+  ReplyHistory,
+  DEFAULT_HISTORY_LIMITS,
+  type HistoryLimits,
+  type HistoryStats,
+} from "./history.js";
+import { createLogger, type LogSink, type TarsLogger } from "./logging.js";
+import { monotonicMs } from "./tracing.js";
 
 export interface TarsServerOptions {
   socketPath?: string;
-  logger?: {
-    info?: (msg: string) => void;
-    warn?: (msg: string) => void;
-    error?: (msg: string) => void;
-  };
-  onMessage?: (text: string) => void;
+  logger?: LogSink | TarsLogger;
+  onMessage?: (text: string, meta: InboundMeta) => void;
+  onCancel?: () => void; // Display asked to abort the reply in flight
+  outboundLimits?: Partial<OutboundLimits>;
+  historyLimits?: Partial<HistoryLimits>;
+}
+
+export interface InboundMeta {
+  traceId?: string; // Utterance trace id sent by the display
+  receivedAt: number; // Monotonic ms when the input was decoded
+}
+
+export interface TarsServerStats {
+  clients: OutboundStats[];
+  overflowDisconnects: number;
+  history: HistoryStats;
+}
+
+// Frames that may be shed when a display falls behind
+const STATUS_TYPES = new Set(["status", "trace"]);
+
+interface ClientState {
+  decoder: FrameDecoder;
+  framed: boolean; // Upgraded to length-prefixed frames via hello
+  encoding: Encoding;
+  streaming: boolean; // Understands reply_start / reply_delta / reply_end
+  replies: Set<string>; // Streamed replies this client has been sent
+  outbound: OutboundQueue;
+}
+
+interface ReplyState {
+  base: string; // Text of earlier assistant messages in this reply
+  segment: string; // Cumulative partial text of the current message
+  partial: boolean; // Partial text has arrived (blocks are then redundant)
 }
 
 export class TarsServer {
   private server: net.Server | null = null;
-  private clients: Set<net.Socket> = new Set();
+  private clients: Map<net.Socket, ClientState> = new Map();
+  private replies: Map<string, ReplyState> = new Map();
+  private replySeq = 0;
+  private history: ReplyHistory;
+  private overflowDisconnects = 0;
+  private outboundLimits: OutboundLimits;
   private socketPath: string;
-  private logger: TarsServerOptions["logger"];
-  private onMessage?: (text: string) => void;
+  private logger: TarsLogger;
+  private onMessage?: (text: string, meta: InboundMeta) => void;
+  private onCancel?: () => void;
 
   constructor(options: TarsServerOptions = {}) {
     this.socketPath = options.socketPath || "/tmp/tars-channel.sock";
     this.onMessage = options.onMessage;
-    this.logger = options.logger || {
-      info: console.log,
-      warn: console.warn,
-      error: console.error,
-    };
+    this.onCancel = options.onCancel;
+    this.outboundLimits = { ...DEFAULT_OUTBOUND_LIMITS, ...options.outboundLimits };
+    this.history = new ReplyHistory({ ...DEFAULT_HISTORY_LIMITS, ...options.historyLimits });
+    this.logger = createLogger(options.logger);
   }
 
   async start(): Promise<void> {
@@ -41,59 +99,74 @@ export class TarsServer {
 
     return new Promise((resolve, reject) => {
       this.server = net.createServer((socket) => {
-        this.logger?.info?.(`[tars-channel] Display connected`);
-        this.clients.add(socket);
-
-        // Buffer for incomplete messages
-        let buffer = "";
+        this.logger.info(`[tars-channel] Display connected`);
+        const outbound = new OutboundQueue(
+          socket,
+          this.outboundLimits,
+          (msg) => encodeMessage(msg, client.framed, client.encoding),
+          (reason) => {
+            this.overflowDisconnects++;
+            this.logger.warn(`[tars-channel] Display too slow (${reason}), disconnecting`);
+          },
+        );
+        const client: ClientState = {
+          decoder: new FrameDecoder(),
+          framed: false,
+          encoding: "json",
+          streaming: false,
+          replies: new Set(),
+          outbound,
+        };
+        this.clients.set(socket, client);
 
         socket.on("error", (err) => {
-          this.logger?.error?.(`[tars-channel] Socket error: ${err.message}`);
+          this.logger.error(() => `[tars-channel] Socket error: ${err.message}`, "socket");
         });
 
         socket.on("close", () => {
-          this.logger?.info?.(`[tars-channel] Display disconnected`);
+          const stats = outbound.getStats();
+          this.logger.info(
+            `[tars-channel] Display disconnected (sent=${stats.sentFrames} dropped=${stats.droppedFrames} ` +
+              `coalesced=${stats.coalescedFrames} drainWaits=${stats.drainWaits} peak=${stats.peakQueuedBytes}B)`,
+          );
           this.clients.delete(socket);
         });
 
-        // Handle incoming messages from display
+        // Handle incoming JSON lines and frames from display
         socket.on("data", (data) => {
-          this.logger?.info?.(`[tars-channel] Received ${data.length} bytes of data`);
-          buffer += data.toString();
-          
-          // Process complete messages (newline-delimited JSON)
-          while (buffer.includes("\n")) {
-            const idx = buffer.indexOf("\n");
-            const line = buffer.slice(0, idx);
-            buffer = buffer.slice(idx + 1);
-            
-            if (!line.trim()) continue;
-            
-            this.logger?.info?.(`[tars-channel] Processing line: ${line.substring(0, 100)}`);
-            try {
-              const msg = JSON.parse(line);
-              this.logger?.info?.(`[tars-channel] Parsed message type: ${msg.type}`);
-              if (msg.type === "input" && msg.text && this.onMessage) {
-                this.logger?.info?.(`[tars-channel] Received input from display: "${msg.text.substring(0, 50)}..."`);
-                this.onMessage(msg.text);
-              } else {
-                this.logger?.warn?.(`[tars-channel] Message not processed: type=${msg.type}, hasText=${!!msg.text}, hasCallback=${!!this.onMessage}`);
-              }
-            } catch (err) {
-              this.logger?.error?.(`[tars-channel] Error processing message: ${err instanceof Error ? err.message : String(err)}`);
-              this.logger?.error?.(`[tars-channel] Stack: ${err instanceof Error ? err.stack : 'no stack'}`);
+          let items;
+          try {
+            items = client.decoder.push(data);
+          } catch (err) {
+            if (err instanceof ProtocolError) {
+              this.logger.error(`[tars-channel] Protocol error, dropping display: ${err.message}`);
+              socket.destroy();
+              return;
             }
+            throw err;
+          }
+
+          for (const item of items) {
+            if (item.kind === "invalid") {
+              this.logger.error(() => `[tars-channel] Error processing message: ${item.error} ${item.preview}`, "invalid");
+              continue;
+            }
+            if (item.kind === "binary") {
+              this.logger.warn(() => `[tars-channel] Ignoring ${item.data.length} byte binary frame`, "binary");
+              continue;
+            }
+            this.handleMessage(socket, client, item.message);
           }
         });
       });
 
       this.server.on("error", (err) => {
-        this.logger?.error?.(`[tars-channel] Server error: ${err.message}`);
+        this.logger.error(`[tars-channel] Server error: ${err.message}`);
         reject(err);
       });
 
       this.server.listen(this.socketPath, () => {
-        this.logger?.info?.(`[tars-channel] Socket server listening on ${this.socketPath}`);
+        this.logger.info(`[tars-channel] Socket server listening on ${this.socketPath}`);
         // Set socket permissions so display app can connect
         fs.chmodSync(this.socketPath, 0o666);
         resolve();
@@ -103,7 +176,7 @@ export class TarsServer {
 
   async stop(): Promise<void> {
     // Close all client connections
-    for (const client of this.clients) {
+    for (const client of this.clients.keys()) {
       try {
         client.destroy();
       } catch (err) {
@@ -116,7 +189,7 @@ export class TarsServer {
     if (this.server) {
       await new Promise<void>((resolve) => {
         this.server!.close(() => {
-          this.logger?.info?.(`[tars-channel] Server stopped`);
+          this.logger.info(`[tars-channel] Server stopped`);
           resolve();
         });
       });
@@ -127,32 +200,215 @@ export class TarsServer {
     if (fs.existsSync(this.socketPath)) {
       try {
         fs.unlinkSync(this.socketPath);
-        this.logger?.info?.(`[tars-channel] Cleaned up socket file`);
+        this.logger.info(`[tars-channel] Cleaned up socket file`);
       } catch (err) {
-        this.logger?.warn?.(`[tars-channel] Failed to clean socket: ${err}`);
+        this.logger.warn(`[tars-channel] Failed to clean socket: ${err}`);
       }
     }
+    this.logger.flush();
+  }
+
+  private handleMessage(socket: net.Socket, client: ClientState, msg: WireMessage): void {
+    if (msg.type === "hello") {
+      const { protocol, encoding } = negotiate(msg);
+      // Reply in the old framing, then switch this connection over
+      this.write(socket, client, {
+        type: "hello",
+        protocol,
+        encoding,
+        maxFrame: MAX_FRAME_BYTES,
+        epoch: this.history.epoch,
+        seq: this.history.lastSeq,
+      });
+      client.framed = protocol >= PROTOCOL_VERSION;
+      client.encoding = encoding;
+      client.decoder.encoding = encoding;
+      client.streaming = Array.isArray(msg.features) && msg.features.includes("stream");
+      this.logger.info(
+        `[tars-channel] Display negotiated protocol v${protocol} (${encoding}${client.streaming ? ", streaming" : ""})`,
+      );
+
+      // Catch a (re)connecting display up on what it missed; the outbound
+      // queue flushes the whole batch in one corked write
+      if (typeof msg.last_seq === "number") {
+        const missed = this.history.missedBy(msg.last_seq, msg.epoch);
+        for (const entry of missed) this.write(socket, client, entry);
+        if (missed.length) {
+          this.logger.info(`[tars-channel] Replayed ${missed.length} messages to display (last_seq=${msg.last_seq})`);
+        }
+      }
+      return;
+    }
+
+    if (msg.type === "cancel") {
+      this.logger.debug(() => `[tars-channel] Display cancelled the current reply`);
+      this.onCancel?.();
+      return;
+    }
+
+    const text = typeof msg.text === "string" ? msg.text : "";
+    if (msg.type === "input" && text && this.onMessage) {
+      this.logger.debug(() => `[tars-channel] Received input from display: "${text.substring(0, 50)}..."`);
+      const traceId = typeof msg.trace_id === "string" ? msg.trace_id : undefined;
+      this.onMessage(text, { traceId, receivedAt: monotonicMs() });
+    } else {
+      this.logger.warn(
+        () => `[tars-channel] Message not processed: type=${msg.type}, hasText=${!!text}, hasCallback=${!!this.onMessage}`,
+        "unprocessed",
+      );
+    }
+  }
+
+  private write(
+    socket: net.Socket,
+    client: ClientState,
+    msg: WireMessage,
+    encoded?: Map<string, Buffer>,
+  ): void {
+    try {
+      // Encode once per wire format when broadcasting
+      const key = client.framed ? client.encoding : "line";
+      let data = encoded?.get(key);
+      if (!data) {
+        data = encodeMessage(msg, client.framed, client.encoding);
+        encoded?.set(key, data);
+      }
+      const kind: FrameKind = msg.type === "reply_delta"
+        ? "delta"
+        : STATUS_TYPES.has(msg.type ?? "") ? "status" : "message";
+      client.outbound.push(data, kind, msg);
+    } catch (err) {
+      this.logger.error(() => `[tars-channel] Failed to send to client: ${err}`, "send");
+    }
   }
 
   /**
    * Send a message to all connected displays
    */
   sendMessage(text: string): void {
-    const msg = JSON.stringify({
+    const msg = this.history.record({
       type: "message",
       text: text,
       timestamp: Date.now(),
-    }) + "\n";
+    });
 
-    for (const client of this.clients) {
-      try {
-        client.write(msg);
-      } catch (err) {
-        this.logger?.error?.(`[tars-channel] Failed to send to client: ${err}`);
+    const encoded = new Map<string, Buffer>();
+    for (const [socket, client] of this.clients) {
+      this.write(socket, client, msg, encoded);
+    }
+  }
+
+  /**
+   * Open a streamed reply; returns the id used by the other reply methods
+   */
+  beginReply(): string {
+    const id = `r${Date.now().toString(36)}-${++this.replySeq}`;
+    this.replies.set(id, { base: "", segment: "", partial: false });
+    return id;
+  }
+
+  /**
+   * Update a reply with the model's cumulative partial text. Streaming
+   * displays receive only the new suffix; a text that does not extend the
+   * previous one starts a new paragraph (the agent began another message).
+   */
+  updateReply(id: string, text: string): void {
+    const reply = this.replies.get(id);
+    if (!reply || !text) return;
+    reply.partial = true;
+
+    let delta: string;
+    if (text.startsWith(reply.segment)) {
+      delta = text.slice(reply.segment.length);
+    } else if (reply.segment.startsWith(text)) {
+      return; // Shorter restatement of what is already shown
+    } else {
+      reply.base = this.replyText(reply) + "\n\n";
+      delta = "\n\n" + text;
+    }
+    reply.segment = text;
+    if (delta) this.streamDelta(id, reply, delta);
+  }
+
+  /**
+   * Deliver a finished reply block. Non-streaming displays get it as a
+   * plain message, as before; streaming displays only need it when no
+   * partial text has been streamed for this reply.
+   */
+  deliverReplyBlock(id: string, text: string): void {
+    const reply = this.replies.get(id);
+    const encoded = new Map<string, Buffer>();
+    let msg: WireMessage = { type: "message", text, timestamp: Date.now() };
+    if (!reply) msg = this.history.record(msg); // Streamed replies are recorded when they end
+    for (const [socket, client] of this.clients) {
+      if (!reply || !client.streaming) this.write(socket, client, msg, encoded);
+    }
+    if (!reply || reply.partial) return;
+
+    const delta = reply.segment ? "\n\n" + text : text;
+    reply.segment += delta;
+    this.streamDelta(id, reply, delta);
+  }
+
+  /**
+   * Close a streamed reply, sending its final text
+   */
+  finishReply(id: string): void {
+    const reply = this.replies.get(id);
+    if (!reply) return;
+    this.replies.delete(id);
+
+    const encoded = new Map<string, Buffer>();
+    const text = this.replyText(reply);
+    const end: WireMessage = { type: "reply_end", id, text };
+    const msg = text ? this.history.record(end) : end;
+    for (const [socket, client] of this.clients) {
+      if (client.replies.delete(id)) this.write(socket, client, msg, encoded);
+    }
+  }
+
+  private replyText(reply: ReplyState): string {
+    return reply.base + reply.segment;
+  }
+
+  private streamDelta(id: string, reply: ReplyState, delta: string): void {
+    const encoded = new Map<string, Buffer>();
+    const started = new Map<string, Buffer>();
+    const now = Date.now();
+    for (const [socket, client] of this.clients) {
+      if (!client.streaming) continue;
+      if (client.replies.has(id)) {
+        this.write(socket, client, { type: "reply_delta", id, text: delta }, encoded);
+      } else {
+        // First frame for this client (or it connected mid-reply)
+        client.replies.add(id);
+        this.write(socket, client, { type: "reply_start", id, text: this.replyText(reply), timestamp: now }, started);
       }
     }
   }
 
+  /**
+   * Report gateway stage times for an utterance trace back to the displays
+   */
+  sendTrace(id: string, stages: Record<string, number>): void {
+    const encoded = new Map<string, Buffer>();
+    const msg = { type: "trace", id, stages };
+    for (const [socket, client] of this.clients) {
+      if (client.framed) this.write(socket, client, msg, encoded);
+    }
+  }
+
+  /**
+   * Outbound queue depth and shedding counters, per display
+   */
+  getStats(): TarsServerStats {
+    return {
+      clients: [...this.clients.values()].map((client) => client.outbound.getStats()),
+      overflowDisconnects: this.overflowDisconnects,
+      history: this.history.getStats(),
+    };
+  }
+
   /**
    * Get number of connected displays
    */
@@ -0,0 +1,30 @@
+/**
+ * Gateway-side stage timestamps for display utterance traces
+ *
+ * Stages are recorded on CLOCK_MONOTONIC in milliseconds (process.hrtime),
+ * the same clock as Python's time.monotonic(), so the display can merge
+ * them straight into its own trace for the utterance.
+ */
+
+export function monotonicMs(): number {
+  return Number(process.hrtime.bigint()) / 1e6;
+}
+
+export class GatewayTrace {
+  readonly id: string;
+  readonly stages: Record<string, number> = {};
+
+  constructor(id: string, receivedAt: number) {
+    this.id = id;
+    this.stages.gateway_receive = receivedAt;
+  }
+
+  /**
+   * Record a stage once; later marks of the same stage are ignored
+   */
+  mark(stage: string): void {
+    if (!(stage in this.stages)) {
+      this.stages[stage] = monotonicMs();
+    }
+  }
+}